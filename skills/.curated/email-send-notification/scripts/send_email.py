@@ -1,15 +1,30 @@
 #!/usr/bin/env python3
+from __future__ import annotations
+
 import argparse
+import functools
+import json
 import os
-import smtplib
-import ssl
+import queue
+import random
+import re
 import sys
 import socket
+import threading
+import time
+from contextlib import contextmanager
 from dataclasses import dataclass
-from email.message import EmailMessage
-from email.utils import formataddr, formatdate, make_msgid
-from textwrap import dedent
-from typing import List, Optional, Tuple
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, TypeVar
+
+# smtplib/ssl/email are imported where they are used: --print-config-template, --check-config and
+# --dry-run never open a connection, and this script is often fired once per event.
+if TYPE_CHECKING:
+    import smtplib
+    import ssl
+    from email.message import EmailMessage
+
+
+_T = TypeVar("_T")
 
 
 def _env(name: str) -> Optional[str]:
@@ -28,13 +43,42 @@ def _env_any(*names: str) -> Optional[str]:
     return None
 
 
+_RECIP_SEP = re.compile(r"[,;]")
+
+
 def _split_recipients(value: str) -> List[str]:
-    parts: List[str] = []
-    for chunk in value.replace(";", ",").split(","):
-        addr = chunk.strip()
-        if addr:
-            parts.append(addr)
-    return parts
+    return [addr for addr in (chunk.strip() for chunk in _RECIP_SEP.split(value)) if addr]
+
+
+def _canonical_addr(addr: str) -> str:
+    # Bare mailbox with the domain lowercased; display-name forms ("Name <a@b>") are unwrapped.
+    if "<" in addr:
+        from email.utils import parseaddr
+
+        addr = parseaddr(addr)[1] or addr
+    local, sep, domain = addr.rpartition("@")
+    return f"{local}@{domain.lower()}" if sep else addr
+
+
+def _normalize_recipients(
+    to_addrs: List[str], cc_addrs: List[str], bcc_addrs: List[str]
+) -> Tuple[List[str], List[str], List[str], List[str]]:
+    """
+    Drop addresses already listed earlier (To before Cc before Bcc) and return the deduplicated
+    header lists plus the bare envelope recipients (one RCPT TO per mailbox).
+    """
+    seen = set()
+    rcpt_addrs: List[str] = []
+    kept: Tuple[List[str], List[str], List[str]] = ([], [], [])
+    for addrs, out in zip((to_addrs, cc_addrs, bcc_addrs), kept):
+        for addr in addrs:
+            canonical = _canonical_addr(addr)
+            if canonical in seen:
+                continue
+            seen.add(canonical)
+            out.append(addr)
+            rcpt_addrs.append(canonical)
+    return kept[0], kept[1], kept[2], rcpt_addrs
 
 
 def _read_body(args: argparse.Namespace) -> str:
@@ -58,14 +102,43 @@ def _connect_smtp(
     tls_min_version: Optional[str],
     tls_max_version: Optional[str],
 ) -> Tuple[smtplib.SMTP, bool]:
+    _SMTP, _SMTP_SSL = _smtp_classes()
     if tls_mode == "ssl":
-        ctx = ssl.create_default_context()
-        _configure_tls_versions(ctx, tls_min_version=tls_min_version, tls_max_version=tls_max_version)
+        ctx = _ssl_ctx(tls_min_version, tls_max_version)
         return _SMTP_SSL(host=host, port=port, timeout=timeout_s, context=ctx, address_family=address_family), True
     smtp = _SMTP(host=host, port=port, timeout=timeout_s, address_family=address_family)
     return smtp, False
 
 
+def _is_retryable(exc: BaseException) -> bool:
+    import smtplib
+    import ssl
+
+    if isinstance(exc, smtplib.SMTPAuthenticationError):
+        return False
+    if isinstance(exc, (socket.timeout, ConnectionRefusedError, smtplib.SMTPServerDisconnected)):
+        return True
+    if isinstance(exc, ssl.SSLError):
+        return isinstance(exc, ssl.SSLEOFError) or "eof" in str(exc).lower()
+    return False
+
+
+def _retry(fn: Callable[[], _T], *, retries: int, base: float, cap: float) -> _T:
+    # Decorrelated jitter: sleep = min(cap, uniform(base, prev_sleep * 3)).
+    delay = base
+    attempt = 0
+    while True:
+        try:
+            return fn()
+        except Exception as e:
+            if attempt >= retries or not _is_retryable(e):
+                raise
+            attempt += 1
+            delay = min(cap, random.uniform(base, delay * 3))
+            sys.stderr.write(f"retry={attempt}/{retries} sleep={delay:.2f}s error={type(e).__name__}: {e}\n")
+            time.sleep(delay)
+
+
 @dataclass(frozen=True)
 class _ResolvedConfig:
     smtp_host: str
@@ -81,6 +154,27 @@ class _ResolvedConfig:
     to_addrs: List[str]
     cc_addrs: List[str]
     bcc_addrs: List[str]
+    rcpt_addrs: List[str]
+    retries: int = 0
+    retry_base: float = 0.5
+    retry_max: float = 10.0
+
+
+def _connect_smtp_with_retry(cfg: _ResolvedConfig, timeout_s: float) -> Tuple[smtplib.SMTP, bool]:
+    return _retry(
+        lambda: _connect_smtp(
+            host=cfg.smtp_host,
+            port=cfg.smtp_port,
+            tls_mode=cfg.smtp_tls,
+            timeout_s=timeout_s,
+            address_family=cfg.address_family,
+            tls_min_version=cfg.tls_min_version,
+            tls_max_version=cfg.tls_max_version,
+        ),
+        retries=cfg.retries,
+        base=cfg.retry_base,
+        cap=cfg.retry_max,
+    )
 
 
 def _default_port(tls_mode: str) -> int:
@@ -106,49 +200,142 @@ def _family_candidates(address_family: str) -> List[int]:
     return [socket.AF_UNSPEC]
 
 
+_RESOLVE_TTL_S = 60.0
+_resolve_cache: Dict[Tuple[str, int, int], Tuple[List[Tuple[Any, ...]], float]] = {}
+_resolve_lock = threading.Lock()
+
+
+def _resolve(host: str, port: int, family: int = socket.AF_UNSPEC) -> List[Tuple[Any, ...]]:
+    # Probe, connect and pooled/batch reconnects all resolve the same host; cache for a short TTL.
+    key = (host, port, family)
+    now = time.monotonic()
+    with _resolve_lock:
+        hit = _resolve_cache.get(key)
+        if hit is not None and hit[1] > now:
+            return hit[0]
+    addrinfos = socket.getaddrinfo(host, port, family=family, type=socket.SOCK_STREAM)
+    with _resolve_lock:
+        _resolve_cache[key] = (addrinfos, now + _RESOLVE_TTL_S)
+    return addrinfos
+
+
+# RFC 8305 "Connection Attempt Delay": head start given to each address before racing the next.
+_HAPPY_EYEBALLS_DELAY_S = 0.25
+
+
+def _interleave_families(addrinfos: List[Tuple[Any, ...]]) -> List[Tuple[Any, ...]]:
+    by_family: Dict[int, List[Tuple[Any, ...]]] = {}
+    for info in addrinfos:
+        by_family.setdefault(info[0], []).append(info)
+    ordered: List[Tuple[Any, ...]] = []
+    queues = list(by_family.values())
+    while any(queues):
+        for q in queues:
+            if q:
+                ordered.append(q.pop(0))
+    return ordered
+
+
+def _connect_addrinfo(info: Tuple[Any, ...], timeout_s: float) -> socket.socket:
+    af, socktype, proto, _canonname, sockaddr = info
+    sock = socket.socket(af, socktype, proto)
+    try:
+        sock.settimeout(timeout_s)
+        sock.connect(sockaddr)
+        return sock
+    except BaseException:
+        try:
+            sock.close()
+        except Exception:
+            pass
+        raise
+
+
+def _close_late_sockets(results: "queue.Queue[Tuple[Optional[socket.socket], Optional[BaseException]]]", n: int) -> None:
+    for _ in range(n):
+        sock, _exc = results.get()
+        if sock is not None:
+            try:
+                sock.close()
+            except Exception:
+                pass
+
+
+def _happy_eyeballs_connect(candidates: List[Tuple[Any, ...]], timeout_s: float) -> socket.socket:
+    # Daemon threads (not an executor): a losing attempt to a black-holed address must not keep
+    # the process alive at exit while it waits out timeout_s.
+    results: "queue.Queue[Tuple[Optional[socket.socket], Optional[BaseException]]]" = queue.Queue()
+
+    def attempt(info: Tuple[Any, ...]) -> None:
+        try:
+            results.put((_connect_addrinfo(info, timeout_s), None))
+        except OSError as e:
+            results.put((None, e))
+
+    started = 0
+    finished = 0
+    last_exc: Optional[BaseException] = None
+    while finished < len(candidates):
+        wait_s: Optional[float] = None
+        if started < len(candidates):
+            threading.Thread(target=attempt, args=(candidates[started],), daemon=True).start()
+            started += 1
+            if started < len(candidates):
+                wait_s = _HAPPY_EYEBALLS_DELAY_S
+        try:
+            sock, exc = results.get(timeout=wait_s)
+        except queue.Empty:
+            continue
+        finished += 1
+        if sock is not None:
+            if started > finished:
+                threading.Thread(target=_close_late_sockets, args=(results, started - finished), daemon=True).start()
+            return sock
+        last_exc = exc
+    assert last_exc is not None
+    raise last_exc
+
+
 def _create_connection_socket(host: str, port: int, timeout_s: float, address_family: str) -> socket.socket:
     last_exc: Optional[BaseException] = None
+    candidates: List[Tuple[Any, ...]] = []
     for family in _family_candidates(address_family):
         try:
-            addrinfos = socket.getaddrinfo(host, port, family=family, type=socket.SOCK_STREAM)
+            candidates.extend(_resolve(host, port, family))
         except OSError as e:
             last_exc = e
-            continue
-        for af, socktype, proto, _canonname, sockaddr in addrinfos:
-            sock = socket.socket(af, socktype, proto)
-            try:
-                sock.settimeout(timeout_s)
-                sock.connect(sockaddr)
-                return sock
-            except OSError as e:
-                last_exc = e
-                try:
-                    sock.close()
-                except Exception:
-                    pass
-                continue
-    if last_exc is not None:
-        raise last_exc
-    raise OSError("failed to resolve/connect")
+    if not candidates:
+        if last_exc is not None:
+            raise last_exc
+        raise OSError("failed to resolve/connect")
+    candidates = _interleave_families(candidates)
+    if len(candidates) == 1:
+        return _connect_addrinfo(candidates[0], timeout_s)
+    return _happy_eyeballs_connect(candidates, timeout_s)
 
 
-class _SMTP(smtplib.SMTP):
-    def __init__(self, *, host: str, port: int, timeout: float, address_family: str):
-        self._address_family = address_family
-        super().__init__(host=host, port=port, timeout=timeout)
+@functools.lru_cache(maxsize=None)
+def _smtp_classes() -> Tuple[type, type]:
+    import smtplib
 
-    def _get_socket(self, host: str, port: int, timeout: float) -> socket.socket:  # type: ignore[override]
-        return _create_connection_socket(host, port, timeout, self._address_family)
+    class _SMTP(smtplib.SMTP):
+        def __init__(self, *, host: str, port: int, timeout: float, address_family: str):
+            self._address_family = address_family
+            super().__init__(host=host, port=port, timeout=timeout)
 
+        def _get_socket(self, host: str, port: int, timeout: float) -> socket.socket:  # type: ignore[override]
+            return _create_connection_socket(host, port, timeout, self._address_family)
 
-class _SMTP_SSL(smtplib.SMTP_SSL):
-    def __init__(self, *, host: str, port: int, timeout: float, context: ssl.SSLContext, address_family: str):
-        self._address_family = address_family
-        super().__init__(host=host, port=port, timeout=timeout, context=context)
+    class _SMTP_SSL(smtplib.SMTP_SSL):
+        def __init__(self, *, host: str, port: int, timeout: float, context: ssl.SSLContext, address_family: str):
+            self._address_family = address_family
+            super().__init__(host=host, port=port, timeout=timeout, context=context)
 
-    def _get_socket(self, host: str, port: int, timeout: float) -> ssl.SSLSocket:  # type: ignore[override]
-        raw = _create_connection_socket(host, port, timeout, self._address_family)
-        return self.context.wrap_socket(raw, server_hostname=host)
+        def _get_socket(self, host: str, port: int, timeout: float) -> ssl.SSLSocket:  # type: ignore[override]
+            raw = _create_connection_socket(host, port, timeout, self._address_family)
+            return self.context.wrap_socket(raw, server_hostname=host)
+
+    return _SMTP, _SMTP_SSL
 
 
 _TLS_VERSION_ALIASES = {
@@ -176,7 +363,9 @@ def _parse_tls_version(value: Optional[str]) -> Optional[str]:
     return _TLS_VERSION_ALIASES[v]
 
 
-def _tls_version_obj(version: str) -> "ssl.TLSVersion":
+def _tls_version_obj(version: str) -> ssl.TLSVersion:
+    import ssl
+
     # ssl.TLSVersion exists in Python 3.7+
     mapping = {
         "1.0": ssl.TLSVersion.TLSv1,
@@ -201,6 +390,16 @@ def _configure_tls_versions(
         ctx.maximum_version = _tls_version_obj(tls_max_version)
 
 
+@functools.lru_cache(maxsize=8)
+def _ssl_ctx(tls_min_version: Optional[str], tls_max_version: Optional[str]) -> ssl.SSLContext:
+    import ssl
+
+    # Loading the CA bundle is the expensive part; one context per version pin is shared by all connections.
+    ctx = ssl.create_default_context()
+    _configure_tls_versions(ctx, tls_min_version=tls_min_version, tls_max_version=tls_max_version)
+    return ctx
+
+
 def _resolve_config(parser: argparse.ArgumentParser, args: argparse.Namespace) -> _ResolvedConfig:
     if not args.smtp_host:
         parser.error("--smtp-host is required (or env SMTP_HOST)")
@@ -215,13 +414,16 @@ def _resolve_config(parser: argparse.ArgumentParser, args: argparse.Namespace) -
 
     if not args.from_addr:
         parser.error('--from is required (or env EMAIL_FROM), example: "no-reply@example.com"')
-    if not args.to:
+    batch_mode = bool(getattr(args, "batch_file", None) or getattr(args, "batch_stdin", False))
+    if not args.to and not batch_mode:
         parser.error('--to is required (or env EMAIL_TO), example: "a@example.com,b@example.com"')
 
-    to_addrs = _split_recipients(args.to)
-    cc_addrs = _split_recipients(args.cc) if args.cc else []
-    bcc_addrs = _split_recipients(args.bcc) if args.bcc else []
-    if not to_addrs:
+    to_addrs, cc_addrs, bcc_addrs, rcpt_addrs = _normalize_recipients(
+        _split_recipients(args.to) if args.to else [],
+        _split_recipients(args.cc) if args.cc else [],
+        _split_recipients(args.bcc) if args.bcc else [],
+    )
+    if args.to and not to_addrs:
         parser.error("--to must contain at least one recipient")
 
     if args.smtp_username and args.smtp_password is None:
@@ -241,6 +443,11 @@ def _resolve_config(parser: argparse.ArgumentParser, args: argparse.Namespace) -
         if _tls_version_obj(tls_min_version) > _tls_version_obj(tls_max_version):
             parser.error("--tls-min-version must be <= --tls-max-version")
 
+    if args.retries < 0:
+        parser.error("--retries must be >= 0")
+    if args.retry_base <= 0 or args.retry_max < args.retry_base:
+        parser.error("--retry-base must be > 0 and <= --retry-max")
+
     return _ResolvedConfig(
         smtp_host=args.smtp_host,
         smtp_port=smtp_port,
@@ -255,54 +462,58 @@ def _resolve_config(parser: argparse.ArgumentParser, args: argparse.Namespace) -
         to_addrs=to_addrs,
         cc_addrs=cc_addrs,
         bcc_addrs=bcc_addrs,
+        rcpt_addrs=rcpt_addrs,
+        retries=args.retries,
+        retry_base=args.retry_base,
+        retry_max=args.retry_max,
     )
 
 
-def _print_config_template() -> None:
-    sys.stdout.write(
-        dedent(
-            """\
-            # SMTP / mail env template (fill in and export)
-            export SMTP_HOST="smtp.example.com"
-            export SMTP_TLS="starttls"  # starttls | ssl | none
-            export SMTP_PORT="587"      # optional; defaults based on SMTP_TLS
-            export SMTP_ADDRESS_FAMILY="auto"  # auto | ipv4 | ipv6 (try ipv4 if your IPv6 path is broken)
-            export SMTP_TLS_MIN_VERSION=""     # optional, e.g. "1.2" to avoid broken TLS1.3 paths
-            export SMTP_TLS_MAX_VERSION=""     # optional, e.g. "1.2" to pin TLS1.2
-
-            # Optional auth (many providers require an app password / auth code)
-            export SMTP_USERNAME="user@example.com"
-            export SMTP_PASSWORD="<app-password-or-auth-code>"
-
-            # Message defaults
-            export EMAIL_FROM="user@example.com"
-            export EMAIL_TO="recipient@example.com,other@example.com"
-            """
-        )
+_CONFIG_TEMPLATE = """\
+# SMTP / mail env template (fill in and export)
+export SMTP_HOST="smtp.example.com"
+export SMTP_TLS="starttls"  # starttls | ssl | none
+export SMTP_PORT="587"      # optional; defaults based on SMTP_TLS
+export SMTP_ADDRESS_FAMILY="auto"  # auto | ipv4 | ipv6 (try ipv4 if your IPv6 path is broken)
+export SMTP_TLS_MIN_VERSION=""     # optional, e.g. "1.2" to avoid broken TLS1.3 paths
+export SMTP_TLS_MAX_VERSION=""     # optional, e.g. "1.2" to pin TLS1.2
+
+# Optional auth (many providers require an app password / auth code)
+export SMTP_USERNAME="user@example.com"
+export SMTP_PASSWORD="<app-password-or-auth-code>"
+
+# Message defaults
+export EMAIL_FROM="user@example.com"
+export EMAIL_TO="recipient@example.com,other@example.com"
+"""
+
+
+def _probe_hint(port_hint: str, openssl_hint: str) -> str:
+    return (
+        "\n"
+        "Troubleshooting hints:\n"
+        "- If you see EOF/handshake failures, your network may be blocking SMTP ports (common for 465/587/25).\n"
+        f"- Try {port_hint} with the matching TLS mode (ssl->465, starttls->587), and test from a different network.\n"
+        f"- Quick port test: nc -vz smtp.example.com {port_hint}\n"
+        f"- TLS test: {openssl_hint}\n"
+        "- In sandboxed runs, network access may require escalated permissions.\n"
     )
 
 
+_PROBE_HINT_SSL = _probe_hint(
+    "465", "openssl s_client -connect smtp.example.com:465 -servername smtp.example.com"
+)
+_PROBE_HINT_STARTTLS = _probe_hint(
+    "587", "openssl s_client -starttls smtp -connect smtp.example.com:587 -servername smtp.example.com"
+)
+
+
+def _print_config_template() -> None:
+    sys.stdout.write(_CONFIG_TEMPLATE)
+
+
 def _print_probe_hints(tls_mode: str) -> None:
-    if tls_mode == "ssl":
-        port_hint = "465"
-        openssl_hint = "openssl s_client -connect smtp.example.com:465 -servername smtp.example.com"
-    else:
-        port_hint = "587"
-        openssl_hint = "openssl s_client -starttls smtp -connect smtp.example.com:587 -servername smtp.example.com"
-
-    sys.stderr.write(
-        dedent(
-            f"""\
-
-            Troubleshooting hints:
-            - If you see EOF/handshake failures, your network may be blocking SMTP ports (common for 465/587/25).
-            - Try {port_hint} with the matching TLS mode (ssl->465, starttls->587), and test from a different network.
-            - Quick port test: nc -vz smtp.example.com {port_hint}
-            - TLS test: {openssl_hint}
-            - In sandboxed runs, network access may require escalated permissions.
-            """
-        )
-    )
+    sys.stderr.write(_PROBE_HINT_SSL if tls_mode == "ssl" else _PROBE_HINT_STARTTLS)
 
 
 def _probe_smtp_connection(
@@ -311,9 +522,17 @@ def _probe_smtp_connection(
     timeout_s: float,
     debug: bool,
     auth: bool,
-) -> int:
+    keep_open: bool = False,
+) -> Tuple[int, Optional[smtplib.SMTP]]:
+    """
+    Returns (exit_code, session). With keep_open=True a successful probe hands back the live,
+    authenticated session so the caller can send on it instead of reconnecting.
+    """
+    import smtplib
+    import ssl
+
     try:
-        infos = socket.getaddrinfo(cfg.smtp_host, cfg.smtp_port, type=socket.SOCK_STREAM)
+        infos = _resolve(cfg.smtp_host, cfg.smtp_port)
         addrs = []
         for family, _socktype, _proto, _canonname, sockaddr in infos:
             ip = sockaddr[0]
@@ -333,43 +552,432 @@ def _probe_smtp_connection(
     except Exception:
         pass
 
-    smtp, is_ssl = _connect_smtp(
-        host=cfg.smtp_host,
-        port=cfg.smtp_port,
-        tls_mode=cfg.smtp_tls,
-        timeout_s=timeout_s,
-        address_family=cfg.address_family,
-        tls_min_version=cfg.tls_min_version,
-        tls_max_version=cfg.tls_max_version,
-    )
+    smtp: Optional[smtplib.SMTP] = None
     try:
+        smtp, is_ssl = _connect_smtp_with_retry(cfg, timeout_s)
         if debug:
             smtp.set_debuglevel(1)
-        smtp.ehlo()
         if not is_ssl and cfg.smtp_tls == "starttls":
-            ctx = ssl.create_default_context()
+            # starttls() sends the pre-TLS EHLO itself (ehlo_or_helo_if_needed).
+            ctx = _ssl_ctx(cfg.tls_min_version, cfg.tls_max_version)
             smtp.starttls(context=ctx)
-            smtp.ehlo()
-        if auth and cfg.smtp_username:
+        smtp.ehlo()
+        if (auth or keep_open) and cfg.smtp_username:
             smtp.login(cfg.smtp_username, cfg.smtp_password or "")
         sys.stdout.write("probe=ok\n")
-        return 0
+        if keep_open:
+            session, smtp = smtp, None
+            return 0, session
+        return 0, None
     except ssl.SSLError as e:
         sys.stderr.write(f"probe=failed ssl_error={type(e).__name__}: {e}\n")
         _print_probe_hints(cfg.smtp_tls)
-        return 2
+        return 2, None
     except (OSError, smtplib.SMTPException) as e:
         sys.stderr.write(f"probe=failed error={type(e).__name__}: {e}\n")
         _print_probe_hints(cfg.smtp_tls)
-        return 2
+        return 2, None
     finally:
+        if smtp is not None:
+            _close_smtp(smtp)
+
+
+def _close_smtp(smtp: smtplib.SMTP) -> None:
+    try:
+        smtp.quit()
+    except Exception:
         try:
-            smtp.quit()
+            smtp.close()
         except Exception:
+            pass
+
+
+def _abort_transaction(smtp: smtplib.SMTP, code: int) -> None:
+    # 421 means the server is closing the channel; anything else leaves it usable after RSET.
+    if code == 421:
+        smtp.close()
+    else:
+        smtp.rset()
+
+
+def _send_bytes(smtp: smtplib.SMTP, from_addr: str, to_addrs: List[str], data: bytes) -> Dict[str, Tuple[int, bytes]]:
+    """
+    Send a CRLF-normalized message. When the server advertises CHUNKING (RFC 3030) the body goes out
+    as a single `BDAT <len> LAST` chunk: no dot-stuffing or line scanning. Otherwise falls back to
+    sendmail() (DATA).
+    """
+    import smtplib
+
+    smtp.ehlo_or_helo_if_needed()
+    if not smtp.has_extn("chunking"):
+        return smtp.sendmail(from_addr, to_addrs, data)
+
+    options = ["BODY=8BITMIME"] if not data.isascii() and smtp.has_extn("8bitmime") else []
+    code, resp = smtp.mail(from_addr, options)
+    if code != 250:
+        _abort_transaction(smtp, code)
+        raise smtplib.SMTPSenderRefused(code, resp, from_addr)
+    refused: Dict[str, Tuple[int, bytes]] = {}
+    for rcpt in to_addrs:
+        code, resp = smtp.rcpt(rcpt)
+        if code not in (250, 251):
+            refused[rcpt] = (code, resp)
+        if code == 421:
+            _abort_transaction(smtp, code)
+            raise smtplib.SMTPRecipientsRefused(refused)
+    if len(refused) == len(to_addrs):
+        _abort_transaction(smtp, 0)
+        raise smtplib.SMTPRecipientsRefused(refused)
+    smtp.send(b"BDAT %d LAST\r\n" % len(data) + data)
+    code, resp = smtp.getreply()
+    if code != 250:
+        _abort_transaction(smtp, code)
+        raise smtplib.SMTPDataError(code, resp)
+    return refused
+
+
+def _open_session(cfg: _ResolvedConfig, timeout_s: float, debug: bool) -> smtplib.SMTP:
+    smtp, is_ssl = _connect_smtp_with_retry(cfg, timeout_s)
+    try:
+        if debug:
+            smtp.set_debuglevel(1)
+        if not is_ssl and cfg.smtp_tls == "starttls":
+            # starttls() sends the pre-TLS EHLO itself (ehlo_or_helo_if_needed) and forgets the
+            # capabilities afterwards, so login()/ehlo_or_helo_if_needed() below re-issue EHLO once.
+            ctx = _ssl_ctx(cfg.tls_min_version, cfg.tls_max_version)
+            smtp.starttls(context=ctx)
+
+        if cfg.smtp_username:
+            smtp.login(cfg.smtp_username, cfg.smtp_password or "")
+        else:
+            smtp.ehlo_or_helo_if_needed()
+    except BaseException:
+        _close_smtp(smtp)
+        raise
+    return smtp
+
+
+def _build_template(
+    cfg: _ResolvedConfig,
+    *,
+    subject: str,
+    body: str,
+    html: Optional[str],
+    cc_addrs: List[str],
+) -> EmailMessage:
+    # Everything except the per-message To/Date/Message-ID headers.
+    from email.message import EmailMessage
+    from email.utils import formataddr
+
+    msg = EmailMessage()
+    msg["From"] = formataddr((cfg.from_name, cfg.from_addr)) if cfg.from_name else cfg.from_addr
+    if cc_addrs:
+        msg["Cc"] = ", ".join(cc_addrs)
+    msg["Subject"] = subject
+    msg["Reply-To"] = cfg.from_addr
+    msg.set_content(body)
+    if html:
+        msg.add_alternative(html, subtype="html")
+    return msg
+
+
+def _build_message(
+    cfg: _ResolvedConfig,
+    *,
+    subject: str,
+    body: str,
+    html: Optional[str],
+    to_addrs: List[str],
+    cc_addrs: List[str],
+) -> EmailMessage:
+    from email.utils import formatdate, make_msgid
+
+    msg = _build_template(cfg, subject=subject, body=body, html=html, cc_addrs=cc_addrs)
+    msg["To"] = ", ".join(to_addrs)
+    msg["Date"] = formatdate(localtime=True)
+    msg["Message-ID"] = make_msgid()
+    return msg
+
+
+def _envelope_headers(to_addrs: List[str]) -> bytes:
+    import email.policy
+    from email.utils import formatdate, make_msgid
+
+    policy = email.policy.SMTP
+    # header_factory parses the value like msg[name] = value would, so non-ASCII display names are
+    # RFC 2047-encoded when folded.
+    return b"".join(
+        policy.header_factory(name, value).fold(policy=policy).encode("ascii")
+        for name, value in (
+            ("To", ", ".join(to_addrs)),
+            ("Date", formatdate(localtime=True)),
+            ("Message-ID", make_msgid()),
+        )
+    )
+
+
+@dataclass(frozen=True)
+class _BatchItem:
+    line_no: int
+    headers: bytes
+    # Serialized template (remaining headers + MIME body); shared between items with identical content.
+    content: bytes
+    recipients: List[str]
+
+    @property
+    def data(self) -> bytes:
+        return self.headers + self.content
+
+
+def _record_recipients(record: dict, key: str, default: List[str]) -> List[str]:
+    value = record.get(key)
+    if value is None:
+        return default
+    if isinstance(value, list):
+        return [str(v).strip() for v in value if str(v).strip()]
+    return _split_recipients(str(value))
+
+
+def _iter_batch_records(stream: Iterable[str]) -> Iterator[Tuple[int, dict]]:
+    for line_no, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            raise ValueError(f"batch line {line_no}: invalid JSON ({e})") from e
+        if not isinstance(record, dict):
+            raise ValueError(f"batch line {line_no}: expected a JSON object")
+        yield line_no, record
+
+
+def _load_batch(cfg: _ResolvedConfig, args: argparse.Namespace) -> List[_BatchItem]:
+    """
+    Each JSONL record may set: to, cc, bcc (string or list), subject, body, html.
+    Missing fields fall back to the CLI/env values (--to/--cc/--bcc/--subject/--body*/--html).
+    """
+    import email.policy
+
+    default_body: Optional[str] = None
+    if args.body is not None or args.body_file is not None:
+        default_body = _read_body(args)
+
+    if args.batch_stdin:
+        records = list(_iter_batch_records(sys.stdin))
+    else:
+        with open(args.batch_file, "r", encoding="utf-8") as f:
+            records = list(_iter_batch_records(f))
+
+    # Defaults are the raw CLI lists: cfg.*_addrs were deduplicated against the CLI --to, which
+    # would drop addresses once a record overrides only some of the fields.
+    default_to = _split_recipients(args.to) if args.to else []
+    default_cc = _split_recipients(args.cc) if args.cc else []
+    default_bcc = _split_recipients(args.bcc) if args.bcc else []
+
+    items: List[_BatchItem] = []
+    templates: Dict[Tuple[str, str, Optional[str], Tuple[str, ...]], bytes] = {}
+    for line_no, record in records:
+        to_addrs, cc_addrs, bcc_addrs, rcpt_addrs = _normalize_recipients(
+            _record_recipients(record, "to", default_to),
+            _record_recipients(record, "cc", default_cc),
+            _record_recipients(record, "bcc", default_bcc),
+        )
+        if not to_addrs:
+            raise ValueError(f"batch line {line_no}: 'to' is required (or pass --to)")
+        subject = record.get("subject", args.subject)
+        if not subject:
+            raise ValueError(f"batch line {line_no}: 'subject' is required (or pass --subject)")
+        if not isinstance(subject, str):
+            raise ValueError(f"batch line {line_no}: 'subject' must be a string")
+        body = record.get("body", default_body)
+        if body is None:
+            raise ValueError(f"batch line {line_no}: 'body' is required (or pass --body / --body-file)")
+        if not isinstance(body, str):
+            raise ValueError(f"batch line {line_no}: 'body' must be a string")
+        html = record.get("html", args.html)
+        if html is not None and not isinstance(html, str):
+            raise ValueError(f"batch line {line_no}: 'html' must be a string")
+        key = (subject, body, html, tuple(cc_addrs))
+        content = templates.get(key)
+        if content is None:
+            template = _build_template(cfg, subject=subject, body=body, html=html, cc_addrs=cc_addrs)
+            content = templates[key] = template.as_bytes(policy=email.policy.SMTP)
+        items.append(
+            _BatchItem(
+                line_no=line_no,
+                headers=_envelope_headers(to_addrs),
+                content=content,
+                recipients=rcpt_addrs,
+            )
+        )
+    return items
+
+
+def _send_batch(
+    *,
+    cfg: _ResolvedConfig,
+    items: List[_BatchItem],
+    timeout_s: float,
+    debug: bool,
+    recycle_after: int,
+) -> int:
+    """
+    Send all items over one authenticated SMTP session, reconnecting once when the server drops us
+    and recycling the connection every `recycle_after` messages (0 disables recycling).
+    """
+    import smtplib
+
+    smtp: Optional[smtplib.SMTP] = None
+    sent_on_session = 0
+    sent = 0
+    failed = 0
+    try:
+        for idx, item in enumerate(items):
+            if smtp is None:
+                try:
+                    smtp = _open_session(cfg, timeout_s, debug)
+                except (OSError, smtplib.SMTPException) as e:
+                    sys.stderr.write(f"send=failed line={item.line_no} error={type(e).__name__}: {e}\n")
+                    _print_probe_hints(cfg.smtp_tls)
+                    failed += len(items) - idx
+                    break
+                sent_on_session = 0
             try:
-                smtp.close()
-            except Exception:
+                try:
+                    _send_bytes(smtp, cfg.from_addr, item.recipients, item.data)
+                except smtplib.SMTPServerDisconnected:
+                    _close_smtp(smtp)
+                    smtp = None
+                    smtp = _open_session(cfg, timeout_s, debug)
+                    sent_on_session = 0
+                    _send_bytes(smtp, cfg.from_addr, item.recipients, item.data)
+            except (OSError, smtplib.SMTPException) as e:
+                sys.stderr.write(f"send=failed line={item.line_no} error={type(e).__name__}: {e}\n")
+                failed += 1
+                if smtp is not None and isinstance(e, (OSError, smtplib.SMTPServerDisconnected)):
+                    _close_smtp(smtp)
+                    smtp = None
+                continue
+            sent += 1
+            sent_on_session += 1
+            if recycle_after and sent_on_session >= recycle_after:
+                _close_smtp(smtp)
+                smtp = None
+    finally:
+        if smtp is not None:
+            _close_smtp(smtp)
+
+    sys.stdout.write(f"sent={sent} failed={failed}\n")
+    return 0 if failed == 0 else 2
+
+
+@dataclass
+class _PoolSlot:
+    smtp: Optional[smtplib.SMTP] = None
+    sent: int = 0
+
+    def reset(self) -> None:
+        if self.smtp is not None:
+            _close_smtp(self.smtp)
+        self.smtp = None
+        self.sent = 0
+
+
+class _SmtpPool:
+    """
+    Fixed-size pool of authenticated SMTP sessions for one server (cfg host/port/tls).
+    Sessions are opened lazily, health-checked with NOOP before reuse, and recycled after
+    `recycle_after` messages (0 disables recycling).
+    """
+
+    def __init__(self, cfg: _ResolvedConfig, *, size: int, timeout_s: float, debug: bool, recycle_after: int):
+        self._cfg = cfg
+        self._timeout_s = timeout_s
+        self._debug = debug
+        self._recycle_after = recycle_after
+        self._slots: "queue.Queue[_PoolSlot]" = queue.Queue()
+        self._all = [_PoolSlot() for _ in range(size)]
+        for slot in self._all:
+            self._slots.put(slot)
+
+    def _ensure_open(self, slot: _PoolSlot) -> None:
+        import smtplib
+
+        if slot.smtp is not None:
+            try:
+                code, _ = slot.smtp.noop()
+                if code == 250:
+                    return
+            except (OSError, smtplib.SMTPException):
                 pass
+            slot.reset()
+        slot.smtp = _open_session(self._cfg, self._timeout_s, self._debug)
+
+    @contextmanager
+    def acquire(self) -> Iterator[_PoolSlot]:
+        import smtplib
+
+        slot = self._slots.get()
+        try:
+            self._ensure_open(slot)
+            yield slot
+        except smtplib.SMTPServerDisconnected:
+            slot.reset()
+            raise
+        finally:
+            if self._recycle_after and slot.sent >= self._recycle_after:
+                slot.reset()
+            self._slots.put(slot)
+
+    def send(self, item: _BatchItem) -> None:
+        import smtplib
+
+        for attempt in range(2):
+            try:
+                with self.acquire() as slot:
+                    assert slot.smtp is not None
+                    _send_bytes(slot.smtp, self._cfg.from_addr, item.recipients, item.data)
+                    slot.sent += 1
+                return
+            except smtplib.SMTPServerDisconnected:
+                if attempt:
+                    raise
+
+    def close(self) -> None:
+        for slot in self._all:
+            slot.reset()
+
+
+def _send_batch_pooled(
+    *,
+    cfg: _ResolvedConfig,
+    items: List[_BatchItem],
+    timeout_s: float,
+    debug: bool,
+    recycle_after: int,
+    pool_size: int,
+) -> int:
+    from concurrent.futures import ThreadPoolExecutor
+
+    pool = _SmtpPool(cfg, size=pool_size, timeout_s=timeout_s, debug=debug, recycle_after=recycle_after)
+    sent = 0
+    failed = 0
+    try:
+        with ThreadPoolExecutor(max_workers=pool_size) as executor:
+            futures = [(item, executor.submit(pool.send, item)) for item in items]
+            for item, future in futures:
+                e = future.exception()
+                if e is None:
+                    sent += 1
+                    continue
+                sys.stderr.write(f"send=failed line={item.line_no} error={type(e).__name__}: {e}\n")
+                failed += 1
+    finally:
+        pool.close()
+
+    sys.stdout.write(f"sent={sent} failed={failed}\n")
+    return 0 if failed == 0 else 2
 
 
 def main(argv: List[str]) -> int:
@@ -394,6 +1002,11 @@ def main(argv: List[str]) -> int:
         action="store_true",
         help="With --probe, also attempt SMTP AUTH if username is set.",
     )
+    parser.add_argument(
+        "--probe-then-send",
+        action="store_true",
+        help="Probe (including AUTH) and, if it succeeds, send on the same SMTP session.",
+    )
     parser.add_argument(
         "--debug-smtp",
         action="store_true",
@@ -471,7 +1084,44 @@ def main(argv: List[str]) -> int:
         help="Optional HTML body; when set, sends multipart (text + html).",
     )
 
+    batch_group = parser.add_mutually_exclusive_group(required=False)
+    batch_group.add_argument(
+        "--batch-file",
+        help="Send many messages over one SMTP session; JSON lines with to/cc/bcc/subject/body/html.",
+    )
+    batch_group.add_argument("--batch-stdin", action="store_true", help="Like --batch-file, but read JSON lines from stdin.")
+    parser.add_argument(
+        "--batch-recycle",
+        type=int,
+        default=100,
+        help="With --batch-*, reconnect after this many messages per session (default: 100; 0 = never).",
+    )
+    parser.add_argument(
+        "--pool-size",
+        type=int,
+        default=1,
+        help="With --batch-*, send over this many concurrent SMTP sessions (default: 1).",
+    )
+
     parser.add_argument("--timeout", type=float, default=20.0, help="SMTP timeout seconds (default: 20)")
+    parser.add_argument(
+        "--retries",
+        type=int,
+        default=0,
+        help="Retry transient connect failures (timeout/refused/TLS EOF/disconnect) this many times (default: 0).",
+    )
+    parser.add_argument(
+        "--retry-base",
+        type=float,
+        default=0.5,
+        help="Minimum backoff seconds between connect retries (default: 0.5).",
+    )
+    parser.add_argument(
+        "--retry-max",
+        type=float,
+        default=10.0,
+        help="Maximum backoff seconds between connect retries (default: 10).",
+    )
     parser.add_argument("--dry-run", action="store_true", help="Print message and exit without sending")
 
     args = parser.parse_args(argv)
@@ -483,97 +1133,122 @@ def main(argv: List[str]) -> int:
     cfg = _resolve_config(parser, args)
     if args.check_config:
         sys.stdout.write(
-            dedent(
-                f"""\
-                OK
-                smtp_host={cfg.smtp_host}
-                smtp_port={cfg.smtp_port}
-                smtp_tls={cfg.smtp_tls}
-                smtp_username={'<set>' if cfg.smtp_username else '<not set>'}
-                smtp_password={'<set>' if cfg.smtp_password else '<not set>'}
-                address_family={cfg.address_family}
-                tls_min_version={cfg.tls_min_version or '<default>'}
-                tls_max_version={cfg.tls_max_version or '<default>'}
-                from={cfg.from_addr}
-                to={','.join(cfg.to_addrs)}
-                """
-            )
+            "OK\n"
+            f"smtp_host={cfg.smtp_host}\n"
+            f"smtp_port={cfg.smtp_port}\n"
+            f"smtp_tls={cfg.smtp_tls}\n"
+            f"smtp_username={'<set>' if cfg.smtp_username else '<not set>'}\n"
+            f"smtp_password={'<set>' if cfg.smtp_password else '<not set>'}\n"
+            f"address_family={cfg.address_family}\n"
+            f"tls_min_version={cfg.tls_min_version or '<default>'}\n"
+            f"tls_max_version={cfg.tls_max_version or '<default>'}\n"
+            f"from={cfg.from_addr}\n"
+            f"to={','.join(cfg.to_addrs)}\n"
         )
         return 0
 
-    if args.probe:
-        return _probe_smtp_connection(
+    if args.probe and not args.probe_then_send:
+        rc, _ = _probe_smtp_connection(
             cfg=cfg,
             timeout_s=args.timeout,
             debug=args.debug_smtp,
             auth=args.probe_auth,
         )
+        return rc
+
+    if args.batch_file or args.batch_stdin:
+        if args.probe_then_send:
+            parser.error("--probe-then-send cannot be combined with --batch-file/--batch-stdin")
+        if args.body_stdin:
+            # Batch bodies come from each record, falling back to --body/--body-file only.
+            parser.error("--body-stdin cannot be combined with --batch-file/--batch-stdin (use --body-file)")
+        if args.batch_recycle < 0:
+            parser.error("--batch-recycle must be >= 0")
+        if args.pool_size < 1:
+            parser.error("--pool-size must be >= 1")
+        try:
+            items = _load_batch(cfg, args)
+        except (OSError, ValueError) as e:
+            parser.error(str(e))
+        if args.dry_run:
+            for item in items:
+                sys.stdout.write(item.data.decode("utf-8", errors="replace").replace("\r\n", "\n") + "\n")
+            return 0
+        if args.pool_size > 1:
+            return _send_batch_pooled(
+                cfg=cfg,
+                items=items,
+                timeout_s=args.timeout,
+                debug=args.debug_smtp,
+                recycle_after=args.batch_recycle,
+                pool_size=args.pool_size,
+            )
+        return _send_batch(
+            cfg=cfg,
+            items=items,
+            timeout_s=args.timeout,
+            debug=args.debug_smtp,
+            recycle_after=args.batch_recycle,
+        )
 
+    if not cfg.to_addrs:
+        parser.error('--to is required (or env EMAIL_TO), example: "a@example.com,b@example.com"')
     if not args.subject:
         parser.error("--subject is required")
     if args.body is None and args.body_file is None and not args.body_stdin:
         parser.error("Body is required (use --body / --body-file / --body-stdin)")
     body = _read_body(args)
 
-    msg = EmailMessage()
-    msg["From"] = formataddr((cfg.from_name, cfg.from_addr)) if cfg.from_name else cfg.from_addr
-    msg["To"] = ", ".join(cfg.to_addrs)
-    if cfg.cc_addrs:
-        msg["Cc"] = ", ".join(cfg.cc_addrs)
-    msg["Subject"] = args.subject
-    msg["Date"] = formatdate(localtime=True)
-    msg["Message-ID"] = make_msgid()
-    msg["Reply-To"] = cfg.from_addr
-    msg.set_content(body)
-    if args.html:
-        msg.add_alternative(args.html, subtype="html")
+    msg = _build_message(
+        cfg,
+        subject=args.subject,
+        body=body,
+        html=args.html,
+        to_addrs=cfg.to_addrs,
+        cc_addrs=cfg.cc_addrs,
+    )
 
     if args.dry_run:
         sys.stdout.write(msg.as_string() + "\n")
         return 0
 
-    all_recipients = cfg.to_addrs + cfg.cc_addrs + cfg.bcc_addrs
+    all_recipients = cfg.rcpt_addrs
 
-    try:
-        smtp, is_ssl = _connect_smtp(
-            host=cfg.smtp_host,
-            port=cfg.smtp_port,
-            tls_mode=cfg.smtp_tls,
+    import smtplib
+    import ssl
+
+    if args.probe_then_send:
+        rc, probed = _probe_smtp_connection(
+            cfg=cfg,
             timeout_s=args.timeout,
-            address_family=cfg.address_family,
-            tls_min_version=cfg.tls_min_version,
-            tls_max_version=cfg.tls_max_version,
+            debug=args.debug_smtp,
+            auth=True,
+            keep_open=True,
         )
-    except ssl.SSLError as e:
-        sys.stderr.write(f"send=failed ssl_error={type(e).__name__}: {e}\n")
-        _print_probe_hints(cfg.smtp_tls)
-        return 2
-    except (OSError, smtplib.SMTPException) as e:
-        sys.stderr.write(f"send=failed error={type(e).__name__}: {e}\n")
-        _print_probe_hints(cfg.smtp_tls)
-        return 2
+        if probed is None:
+            return rc
+        smtp = probed
+    else:
+        try:
+            smtp = _open_session(cfg, args.timeout, args.debug_smtp)
+        except ssl.SSLError as e:
+            sys.stderr.write(f"send=failed ssl_error={type(e).__name__}: {e}\n")
+            _print_probe_hints(cfg.smtp_tls)
+            return 2
+        except (OSError, smtplib.SMTPException) as e:
+            sys.stderr.write(f"send=failed error={type(e).__name__}: {e}\n")
+            _print_probe_hints(cfg.smtp_tls)
+            return 2
     try:
-        if args.debug_smtp:
-            smtp.set_debuglevel(1)
-        smtp.ehlo()
-        if not is_ssl and cfg.smtp_tls == "starttls":
-            ctx = ssl.create_default_context()
-            _configure_tls_versions(ctx, tls_min_version=cfg.tls_min_version, tls_max_version=cfg.tls_max_version)
-            smtp.starttls(context=ctx)
-            smtp.ehlo()
+        smtp.ehlo_or_helo_if_needed()
+        if smtp.has_extn("chunking"):
+            import email.policy
 
-        if cfg.smtp_username:
-            smtp.login(cfg.smtp_username, cfg.smtp_password or "")
-
-        smtp.send_message(msg, from_addr=cfg.from_addr, to_addrs=all_recipients)
+            _send_bytes(smtp, cfg.from_addr, all_recipients, msg.as_bytes(policy=email.policy.SMTP))
+        else:
+            smtp.send_message(msg, from_addr=cfg.from_addr, to_addrs=all_recipients)
     finally:
-        try:
-            smtp.quit()
-        except Exception:
-            try:
-                smtp.close()
-            except Exception:
-                pass
+        _close_smtp(smtp)
 
     return 0
 
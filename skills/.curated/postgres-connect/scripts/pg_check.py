@@ -1,39 +1,72 @@
 import argparse
-import json
 import sys
 
-from pg_lib import PgSkillError, add_common_args, load_connection_from_args, redact_connection_hint, run_psql
+from pg_lib import (
+    PgSkillError,
+    add_common_args,
+    json_dumps_pretty,
+    json_loads,
+    load_connection_from_args,
+    redact_connection_hint,
+    run_psql,
+)
 
 
-def _suggest_fixes(stderr_text: str) -> list[str]:
-    s = (stderr_text or "").lower()
-    suggestions: list[str] = []
+_LOCAL_TCP_BLOCKED = (("operation not permitted",), ("127.0.0.1", "localhost"))
 
-    if "no password supplied" in s or "fe_sendauth" in s:
-        suggestions.append(
-            "缺少密码：如果 profile 配了 `password_env`，请先 `export <ENV_VAR>='...'`；"
-            "脚本使用 `psql -w` 不会交互式询问密码。"
-        )
-    if "operation not permitted" in s and ("127.0.0.1" in s or "localhost" in s):
-        suggestions.append("看起来本机 TCP 连接被限制/拦截：如果你在用 Postgres.app，建议把 profile 的 host 改成 `/tmp` 走 Unix socket。")
-        suggestions.append("也可以尝试其他 socket 目录：`/var/run/postgresql`。")
-        suggestions.append("如果你确实要走 TCP（localhost/127.0.0.1），在 network 受限的环境里需要对该命令授予网络权限（approval）。")
-    if "password authentication failed" in s:
-        suggestions.append("密码认证失败：确认 `password_env` 指向的环境变量已 export，且用户名/密码正确。")
-    if "does not exist" in s and "database" in s:
-        suggestions.append("数据库不存在：确认 `dbname` 拼写，或先创建库（例如 `createdb <dbname>`）。")
-    if "does not exist" in s and "role" in s:
-        suggestions.append("用户/角色不存在：确认 `user` 配置正确，或先创建该角色。")
-    if "no pg_hba.conf entry" in s:
-        suggestions.append("pg_hba.conf 拒绝连接：需要在服务端放通来源/用户/库，并匹配 SSL 模式。")
-    if "connection refused" in s:
-        suggestions.append("连接被拒绝：确认 PostgreSQL 正在运行、端口正确，且监听了目标地址。")
-    if "timeout expired" in s:
-        suggestions.append("连接超时：检查 host/port 是否可达，或适当增大 `connect_timeout`。")
-    if "no such file or directory" in s and "is the server running locally" in s:
-        suggestions.append("找不到 Unix socket：如果你配置了 socket 目录（如 `/tmp`），确认服务端 socket 文件实际在该目录。")
+# (conditions, suggestion): every condition is a tuple of alternatives, and all conditions must match.
+_RULES: tuple[tuple[tuple[tuple[str, ...], ...], str], ...] = (
+    (
+        (("no password supplied", "fe_sendauth"),),
+        "缺少密码：如果 profile 配了 `password_env`，请先 `export <ENV_VAR>='...'`；"
+        "脚本使用 `psql -w` 不会交互式询问密码。",
+    ),
+    (
+        _LOCAL_TCP_BLOCKED,
+        "看起来本机 TCP 连接被限制/拦截：如果你在用 Postgres.app，建议把 profile 的 host 改成 `/tmp` 走 Unix socket。",
+    ),
+    (
+        _LOCAL_TCP_BLOCKED,
+        "也可以尝试其他 socket 目录：`/var/run/postgresql`。",
+    ),
+    (
+        _LOCAL_TCP_BLOCKED,
+        "如果你确实要走 TCP（localhost/127.0.0.1），在 network 受限的环境里需要对该命令授予网络权限（approval）。",
+    ),
+    (
+        (("password authentication failed",),),
+        "密码认证失败：确认 `password_env` 指向的环境变量已 export，且用户名/密码正确。",
+    ),
+    (
+        (("does not exist",), ("database",)),
+        "数据库不存在：确认 `dbname` 拼写，或先创建库（例如 `createdb <dbname>`）。",
+    ),
+    (
+        (("does not exist",), ("role",)),
+        "用户/角色不存在：确认 `user` 配置正确，或先创建该角色。",
+    ),
+    (
+        (("no pg_hba.conf entry",),),
+        "pg_hba.conf 拒绝连接：需要在服务端放通来源/用户/库，并匹配 SSL 模式。",
+    ),
+    (
+        (("connection refused",),),
+        "连接被拒绝：确认 PostgreSQL 正在运行、端口正确，且监听了目标地址。",
+    ),
+    (
+        (("timeout expired",),),
+        "连接超时：检查 host/port 是否可达，或适当增大 `connect_timeout`。",
+    ),
+    (
+        (("no such file or directory",), ("is the server running locally",)),
+        "找不到 Unix socket：如果你配置了 socket 目录（如 `/tmp`），确认服务端 socket 文件实际在该目录。",
+    ),
+)
 
-    return suggestions
+
+def _suggest_fixes(stderr_text: str) -> list[str]:
+    s = (stderr_text or "").lower()
+    return [msg for conditions, msg in _RULES if all(any(k in s for k in alts) for alts in conditions)]
 
 
 def _print_next_steps(config_path, profile_name: str) -> None:
@@ -79,9 +112,9 @@ def main() -> int:
                     sys.stderr.write(f"- {hint}\n")
             return proc.returncode
 
-        payload = json.loads((proc.stdout or "").strip() or "{}")
+        payload = json_loads((proc.stdout or "").strip() or "{}")
         if args.format == "json":
-            sys.stdout.write(json.dumps(payload, ensure_ascii=False, indent=2) + "\n")
+            sys.stdout.write(json_dumps_pretty(payload) + "\n")
         else:
             sys.stdout.write(
                 "OK\n"
@@ -1,134 +1,203 @@
 import argparse
-import re
+import subprocess
 import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
 
-from pg_lib import PgSkillError, add_common_args, load_connection_from_args, redact_connection_hint, run_psql
-
-
-_IDENT_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+from pg_lib import (
+    IDENT_RE,
+    PgSkillError,
+    PsqlConnection,
+    PsqlSession,
+    add_common_args,
+    json_dumps_pretty,
+    json_loads,
+    load_connection_from_args,
+    psql_set_command,
+    redact_connection_hint,
+    run_psql,
+    run_psql_stream,
+)
 
 
+# Reads pg_catalog directly (information_schema views re-join pg_class/pg_attribute and run ACL checks
+# per row). `rel` is resolved once and every section joins on its oid. Materialized views ('m') only
+# feed the indexes section, matching what information_schema and pg_indexes reported.
 INTROSPECT_SQL = r"""
-with tbl as (
-  select
-    t.table_schema,
-    t.table_name,
-    t.table_type
-  from information_schema.tables t
-  where t.table_schema = :'schema'
-    and t.table_type in ('BASE TABLE', 'VIEW')
-),
-col as (
-  select
-    c.table_schema,
-    c.table_name,
-    c.column_name,
-    c.ordinal_position,
-    c.data_type,
-    c.udt_name,
-    c.is_nullable,
-    c.column_default
-  from information_schema.columns c
-  where c.table_schema = :'schema'
-),
-idx as (
+with rel as (
   select
-    schemaname as table_schema,
-    tablename as table_name,
-    indexname,
-    indexdef
-  from pg_indexes
-  where schemaname = :'schema'
-),
-con as (
-  select
-    tc.table_schema,
-    tc.table_name,
-    tc.constraint_name,
-    tc.constraint_type,
-    kcu.column_name,
-    ccu.table_schema as foreign_table_schema,
-    ccu.table_name as foreign_table_name,
-    ccu.column_name as foreign_column_name
-  from information_schema.table_constraints tc
-  left join information_schema.key_column_usage kcu
-    on tc.constraint_name = kcu.constraint_name
-   and tc.table_schema = kcu.table_schema
-   and tc.table_name = kcu.table_name
-  left join information_schema.constraint_column_usage ccu
-    on tc.constraint_name = ccu.constraint_name
-   and tc.table_schema = ccu.table_schema
-  where tc.table_schema = :'schema'
+    c.oid,
+    c.relname,
+    c.relkind
+  from pg_catalog.pg_class c
+  join pg_catalog.pg_namespace n on n.oid = c.relnamespace
+  where n.nspname = :'schema'
+    and c.relkind in ('r', 'p', 'v', 'f', 'm')
 )
 select jsonb_pretty(jsonb_build_object(
   'schema', :'schema',
   'tables', (
     select coalesce(jsonb_agg(jsonb_build_object(
-      'name', table_name,
-      'type', table_type
-    ) order by table_name), '[]'::jsonb)
-    from tbl
+      'name', r.relname,
+      'type', case when r.relkind = 'v' then 'VIEW' else 'BASE TABLE' end
+    ) order by r.relname), '[]'::jsonb)
+    from rel r
+    where r.relkind in ('r', 'p', 'v')
   ),
   'columns', (
     select coalesce(jsonb_agg(jsonb_build_object(
-      'table', table_name,
-      'name', column_name,
-      'position', ordinal_position,
-      'data_type', data_type,
-      'udt', udt_name,
-      'nullable', (is_nullable = 'YES'),
-      'default', column_default
-    ) order by table_name, ordinal_position), '[]'::jsonb)
-    from col
+      'table', r.relname,
+      'name', a.attname,
+      'position', a.attnum,
+      'data_type', pg_catalog.format_type(a.atttypid, null),
+      'udt', t.typname,
+      'nullable', not a.attnotnull,
+      'default', pg_catalog.pg_get_expr(d.adbin, d.adrelid)
+    ) order by r.relname, a.attnum), '[]'::jsonb)
+    from rel r
+    join pg_catalog.pg_attribute a on a.attrelid = r.oid and a.attnum > 0 and not a.attisdropped
+    join pg_catalog.pg_type t on t.oid = a.atttypid
+    left join pg_catalog.pg_attrdef d on d.adrelid = a.attrelid and d.adnum = a.attnum
+    where r.relkind <> 'm'
   ),
   'indexes', (
     select coalesce(jsonb_agg(jsonb_build_object(
-      'table', table_name,
-      'name', indexname,
-      'def', indexdef
-    ) order by table_name, indexname), '[]'::jsonb)
-    from idx
+      'table', r.relname,
+      'name', ic.relname,
+      'def', pg_catalog.pg_get_indexdef(i.indexrelid)
+    ) order by r.relname, ic.relname), '[]'::jsonb)
+    from rel r
+    join pg_catalog.pg_index i on i.indrelid = r.oid
+    join pg_catalog.pg_class ic on ic.oid = i.indexrelid
   ),
   'constraints', (
     select coalesce(jsonb_agg(jsonb_build_object(
-      'table', table_name,
-      'name', constraint_name,
-      'type', constraint_type,
-      'column', column_name,
-      'ref_schema', foreign_table_schema,
-      'ref_table', foreign_table_name,
-      'ref_column', foreign_column_name
-    ) order by table_name, constraint_name), '[]'::jsonb)
-    from con
+      'table', r.relname,
+      'name', con.conname,
+      'type', case con.contype
+        when 'p' then 'PRIMARY KEY'
+        when 'u' then 'UNIQUE'
+        when 'f' then 'FOREIGN KEY'
+        else 'CHECK'
+      end,
+      'column', a.attname,
+      'ref_schema', case when con.contype = 'f' then fn.nspname when con.contype in ('p', 'u') then :'schema' end,
+      'ref_table', case when con.contype = 'f' then fr.relname when con.contype in ('p', 'u') then r.relname end,
+      'ref_column', case when con.contype = 'f' then fa.attname when con.contype in ('p', 'u') then a.attname end
+    ) order by r.relname, con.conname, k.ord), '[]'::jsonb)
+    from rel r
+    join pg_catalog.pg_constraint con on con.conrelid = r.oid and con.contype in ('p', 'u', 'f', 'c')
+    left join lateral unnest(
+      case when con.contype = 'c' then null else con.conkey end,
+      con.confkey
+    ) with ordinality as k(attnum, fattnum, ord) on true
+    left join pg_catalog.pg_attribute a on a.attrelid = con.conrelid and a.attnum = k.attnum
+    left join pg_catalog.pg_class fr on fr.oid = con.confrelid
+    left join pg_catalog.pg_namespace fn on fn.oid = fr.relnamespace
+    left join pg_catalog.pg_attribute fa on fa.attrelid = con.confrelid and fa.attnum = k.fattnum
   )
 ))::text;
 """
 
 
+LIST_SCHEMAS_SQL = r"""
+select n.nspname
+from pg_namespace n
+where n.nspname <> 'information_schema' and n.nspname not like 'pg\_%' escape '\'
+order by n.nspname;
+"""
+
+
+def _list_schemas(conn: PsqlConnection) -> list[str]:
+    proc = run_psql(conn, ["-qAt"], input_text=LIST_SCHEMAS_SQL, capture_output=True)
+    if proc.returncode != 0:
+        raise PgSkillError(f"psql failed: {redact_connection_hint(conn)}\n{proc.stderr or ''}")
+    return [line for line in (proc.stdout or "").splitlines() if line]
+
+
+def _introspect(conn: PsqlConnection, schema: str) -> subprocess.CompletedProcess:
+    return run_psql(conn, ["-qAt", "-v", f"schema={schema}"], input_text=INTROSPECT_SQL, capture_output=True)
+
+
+def _introspect_in_session(conn: PsqlConnection, schemas: Optional[list[str]]) -> dict:
+    # Listing (for --all) and every schema share one psql process and connection.
+    with PsqlSession(conn, ["-qAt"]) as session:
+        if schemas is None:
+            schemas = [line for line in session.query(LIST_SCHEMAS_SQL).splitlines() if line]
+        merged = {}
+        for schema in schemas:
+            out = session.query(psql_set_command("schema", schema) + INTROSPECT_SQL)
+            merged[schema] = json_loads(out.strip() or "{}")
+        return merged
+
+
 def main() -> int:
     parser = argparse.ArgumentParser(description="Introspect a PostgreSQL schema and print JSON via psql.")
     add_common_args(parser)
-    parser.add_argument("--schema", default="public", help="Schema name to introspect (default: public).")
+    parser.add_argument(
+        "--schema",
+        default="public",
+        help="Schema name(s) to introspect, comma-separated (default: public).",
+    )
+    parser.add_argument("--all", action="store_true", help="Introspect every non-system schema (overrides --schema).")
+    parser.add_argument(
+        "--parallel",
+        type=int,
+        default=4,
+        help=(
+            "Max concurrent psql processes when introspecting several schemas (default: 4); "
+            "1 runs them all over a single psql session/connection."
+        ),
+    )
     args = parser.parse_args()
 
     try:
-        if not _IDENT_RE.fullmatch(args.schema):
-            raise PgSkillError("--schema must be a simple identifier (letters/numbers/_), e.g. public")
+        if args.parallel < 1:
+            raise PgSkillError("--parallel must be >= 1")
 
         _, _, conn = load_connection_from_args(args)
-        proc = run_psql(
-            conn,
-            ["-qAt", "-v", f"schema={args.schema}"],
-            input_text=INTROSPECT_SQL,
-            capture_output=True,
-        )
-        if proc.returncode != 0:
-            sys.stderr.write(f"psql failed: {redact_connection_hint(conn)}\n")
-            sys.stderr.write(proc.stderr or "")
-            return proc.returncode
-        sys.stdout.write(proc.stdout)
-        if not proc.stdout.endswith("\n"):
-            sys.stdout.write("\n")
+        schemas = []
+        if not args.all:
+            schemas = [s.strip() for s in args.schema.split(",") if s.strip()]
+            for schema in schemas:
+                if not IDENT_RE.fullmatch(schema):
+                    raise PgSkillError("--schema must be a simple identifier (letters/numbers/_), e.g. public")
+            if not schemas:
+                raise PgSkillError("--schema must name at least one schema")
+
+        if len(schemas) == 1 and not args.all:
+            # psql -At terminates the row with a newline, so its output can go straight to our stdout.
+            proc = run_psql_stream(
+                conn,
+                ["-qAt", "-v", f"schema={schemas[0]}"],
+                input_text=INTROSPECT_SQL,
+            )
+            if proc.returncode != 0:
+                sys.stderr.write(f"psql failed: {redact_connection_hint(conn)}\n")
+                sys.stderr.write(proc.stderr or "")
+                return proc.returncode
+            return 0
+
+        # The shared session needs psql 13+ (\warn); older clients take the per-schema path below.
+        if args.parallel == 1 and PsqlSession.supported():
+            merged = _introspect_in_session(conn, None if args.all else schemas)
+            sys.stdout.write(json_dumps_pretty(merged) + "\n")
+            return 0
+
+        if args.all:
+            schemas = _list_schemas(conn)
+        # Each schema is an independent psql process; threads only wait on them.
+        with ThreadPoolExecutor(max_workers=min(args.parallel, len(schemas) or 1)) as executor:
+            procs = list(executor.map(lambda schema: _introspect(conn, schema), schemas))
+
+        merged = {}
+        for schema, proc in zip(schemas, procs):
+            if proc.returncode != 0:
+                sys.stderr.write(f"psql failed (schema={schema}): {redact_connection_hint(conn)}\n")
+                sys.stderr.write(proc.stderr or "")
+                return proc.returncode
+            merged[schema] = json_loads((proc.stdout or "").strip() or "{}")
+        sys.stdout.write(json_dumps_pretty(merged) + "\n")
         return 0
     except PgSkillError as exc:
         sys.stderr.write(str(exc).rstrip() + "\n")
@@ -1,4 +1,6 @@
-import argparse
+from __future__ import annotations
+
+import functools
 import os
 import re
 import shlex
@@ -7,7 +9,12 @@ import subprocess
 import sys
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Tuple, Union
+
+# json/orjson, importlib and the PsqlSession threading modules are imported where they are used:
+# pg_query and redact_env_yaml never touch them, and their cold start is most of each run.
+if TYPE_CHECKING:  # annotations only; pg_query/redact_env_yaml avoid importing argparse when they can
+    import argparse
 
 
 DEFAULT_CONFIG_PATH = Path("env.yaml")
@@ -18,7 +25,41 @@ class PgSkillError(RuntimeError):
     pass
 
 
+@functools.lru_cache(maxsize=1)
+def _orjson() -> Any:
+    try:  # optional: much faster parsing/serialization of large psql JSON payloads
+        import orjson
+    except ImportError:
+        return None
+    return orjson
+
+
+def json_loads(data: Union[str, bytes]) -> Any:
+    orjson = _orjson()
+    if orjson is not None:
+        return orjson.loads(data)
+    import json
+
+    return json.loads(data)
+
+
+def json_dumps_pretty(obj: Any) -> str:
+    orjson = _orjson()
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode("utf-8")
+    import json
+
+    return json.dumps(obj, ensure_ascii=False, indent=2)
+
+
 def _strip_inline_comment(value: str) -> str:
+    hash_idx = value.find("#")
+    if hash_idx < 0:
+        return value.rstrip()
+    head = value[:hash_idx]
+    if "'" not in head and '"' not in head:
+        # No quote can be open yet, so the first '#' starts the comment.
+        return head.rstrip()
     in_single = False
     in_double = False
     for idx, ch in enumerate(value):
@@ -44,37 +85,61 @@ def _parse_scalar(raw: str) -> Any:
         return True
     if lowered in {"false", "no", "off"}:
         return False
-    if re.fullmatch(r"-?\d+", raw):
-        try:
-            return int(raw)
-        except ValueError:
-            return raw
-    if re.fullmatch(r"-?\d+\.\d+", raw):
-        try:
-            return float(raw)
-        except ValueError:
-            return raw
+    # Only -?\d+ and -?\d+.\d+ (ASCII digits) are numbers; check characters, not regexes.
+    if raw[0] in "-0123456789" and raw.isascii():
+        whole, dot, frac = (raw[1:] if raw[0] == "-" else raw).partition(".")
+        if whole.isdigit():
+            if not dot:
+                return int(raw)
+            if frac.isdigit():
+                return float(raw)
     return raw
 
 
-def parse_simple_yaml_mapping(text: str) -> Dict[str, Any]:
+# Config keys the scripts look up; parsed keys are swapped for these interned copies so later dict
+# lookups with the same literals succeed on the identity check.
+_KNOWN_KEYS = {
+    key: sys.intern(key)
+    for key in (
+        "postgres-connect", "default", "datasources", "host", "port", "user", "dbname", "url",
+        "url_env", "password", "password_env", "sslmode", "connect_timeout",
+    )
+}
+
+
+def parse_simple_yaml_mapping(
+    lines: Union[str, Iterable[str]], only_root: Optional[str] = None
+) -> Dict[str, Any]:
     """
     Minimal YAML subset parser for mappings only (indentation with 2 spaces).
     Supports the structure used by references/env-demo.yaml:
       - top-level key: value
       - nested maps using indentation (no lists)
       - comments (# ...) and quoted/unquoted scalars
+    Accepts the whole text or an iterable of lines (e.g. an open file). With
+    only_root, other top-level blocks are skipped unparsed and parsing stops
+    once that block ends.
     """
 
+    if isinstance(lines, str):
+        lines = lines.splitlines()
     root: Dict[str, Any] = {}
     stack: List[Tuple[int, Dict[str, Any]]] = [(0, root)]
+    skipping = False
 
-    for line_no, original_line in enumerate(text.splitlines(), start=1):
-        line = original_line.rstrip("\n")
+    for line_no, original_line in enumerate(lines, start=1):
+        line = original_line.rstrip("\r\n")
         if not line.strip() or line.lstrip().startswith("#"):
             continue
 
         indent = len(line) - len(line.lstrip(" "))
+        if only_root is not None:
+            if indent == 0:
+                if only_root in root:
+                    break
+                skipping = line.split(":", 1)[0].strip() != only_root
+            if skipping:
+                continue
         if indent % 2 != 0:
             raise PgSkillError(f"Invalid indentation at line {line_no}: use 2-space indents.")
 
@@ -84,6 +149,7 @@ def parse_simple_yaml_mapping(text: str) -> Dict[str, Any]:
 
         key, rest = content.split(":", 1)
         key = key.strip()
+        key = _KNOWN_KEYS.get(key, key)
         if not key:
             raise PgSkillError(f"Invalid YAML at line {line_no}: empty key.")
 
@@ -123,7 +189,8 @@ def load_config(path: Path) -> Dict[str, Any]:
             f"Create one from references/env-demo.yaml, or set {CONFIG_ENV_VAR}, or pass --config."
         )
     try:
-        raw = parse_simple_yaml_mapping(path.read_text(encoding="utf-8"))
+        with path.open("r", encoding="utf-8") as f:
+            raw = parse_simple_yaml_mapping(f, only_root="postgres-connect")
     except OSError as exc:
         raise PgSkillError(f"Failed to read config: {path} ({exc})") from exc
 
@@ -165,7 +232,20 @@ def pick_profile(config: Dict[str, Any], profile: Optional[str]) -> Tuple[str, D
 @dataclass(frozen=True)
 class PsqlConnection:
     args: List[str]
-    env: Dict[str, str]
+    # Only the changes to apply on top of os.environ for psql; None unsets a variable.
+    env: Dict[str, Optional[str]]
+
+
+def _child_env(conn: PsqlConnection) -> Optional[Dict[str, str]]:
+    if not conn.env:
+        return None  # inherit this process's environment as-is
+    env = dict(os.environ)
+    for name, value in conn.env.items():
+        if value is None:
+            env.pop(name, None)
+        else:
+            env[name] = value
+    return env
 
 
 def _get_env_required(var_name: str) -> str:
@@ -175,12 +255,19 @@ def _get_env_required(var_name: str) -> str:
     return value
 
 
-def build_psql_connection(profile_cfg: Dict[str, Any]) -> PsqlConnection:
-    if shutil.which("psql") is None:
+@functools.lru_cache(maxsize=1)
+def _psql_path() -> Optional[str]:
+    # One PATH walk per process; the absolute path also spares exec from searching PATH again.
+    return shutil.which("psql")
+
+
+def build_psql_connection(profile_cfg: Dict[str, Any], *, require_psql: bool = True) -> PsqlConnection:
+    if require_psql and _psql_path() is None:
         raise PgSkillError("psql not found in PATH. Install PostgreSQL client tools or ensure psql is available.")
 
-    env: Dict[str, str] = dict(os.environ)
-    env.setdefault("PGAPPNAME", "codex-postgres-connect")
+    env: Dict[str, Optional[str]] = {}
+    if "PGAPPNAME" not in os.environ:
+        env["PGAPPNAME"] = "codex-postgres-connect"
 
     sslmode = profile_cfg.get("sslmode")
     if isinstance(sslmode, str) and sslmode:
@@ -198,8 +285,8 @@ def build_psql_connection(profile_cfg: Dict[str, Any]) -> PsqlConnection:
         password_value = os.environ.get(password_env)
         if password_value:
             env["PGPASSWORD"] = password_value
-        else:
-            env.pop("PGPASSWORD", None)
+        elif "PGPASSWORD" in os.environ:
+            env["PGPASSWORD"] = None
 
     url = profile_cfg.get("url")
     url_env = profile_cfg.get("url_env")
@@ -229,21 +316,29 @@ def build_psql_connection(profile_cfg: Dict[str, Any]) -> PsqlConnection:
     )
 
 
+def _psql_cmd(conn: PsqlConnection, extra_args: List[str]) -> List[str]:
+    # -w: never prompt for password (fail fast in non-interactive runs)
+    return [_psql_path() or "psql", "-X", "-w", "-v", "ON_ERROR_STOP=1", "-P", "pager=off", *conn.args, *extra_args]
+
+
 def run_psql(
     conn: PsqlConnection,
     extra_args: List[str],
     *,
     input_text: Optional[str] = None,
     capture_output: bool = False,
+    text: bool = True,
 ) -> subprocess.CompletedProcess:
-    # -w: never prompt for password (fail fast in non-interactive runs)
-    cmd = ["psql", "-X", "-w", "-v", "ON_ERROR_STOP=1", "-P", "pager=off", *conn.args, *extra_args]
+    """With text=False, captured stdout/stderr are raw bytes (no decode/newline translation)."""
+    cmd = _psql_cmd(conn, extra_args)
+    if input_text is not None and not text:
+        input_text = input_text.encode("utf-8")
     try:
         return subprocess.run(
             cmd,
             input=input_text,
-            text=True,
-            env=conn.env,
+            text=text,
+            env=_child_env(conn),
             capture_output=capture_output,
             check=False,
         )
@@ -251,12 +346,217 @@ def run_psql(
         raise PgSkillError(f"Failed to run psql: {exc}") from exc
 
 
+def run_psql_stream(
+    conn: PsqlConnection,
+    extra_args: List[str],
+    *,
+    input_text: Optional[str] = None,
+) -> subprocess.CompletedProcess:
+    """
+    Like run_psql, but psql writes straight to this process's stdout (nothing is buffered in Python).
+    Only stderr is captured, for error reporting.
+    """
+    cmd = _psql_cmd(conn, extra_args)
+    sys.stdout.flush()
+    try:
+        return subprocess.run(
+            cmd,
+            input=input_text,
+            text=True,
+            env=_child_env(conn),
+            stderr=subprocess.PIPE,
+            check=False,
+        )
+    except OSError as exc:
+        raise PgSkillError(f"Failed to run psql: {exc}") from exc
+
+
+_PSQL_ARG_TO_CONNINFO = {"-h": "host", "-p": "port", "-U": "user", "-d": "dbname"}
+_ENV_TO_CONNINFO = {
+    "PGPASSWORD": "password",
+    "PGSSLMODE": "sslmode",
+    "PGCONNECT_TIMEOUT": "connect_timeout",
+    "PGAPPNAME": "application_name",
+}
+
+
+@functools.lru_cache(maxsize=1)
+def psycopg_available() -> bool:
+    # Optional backend: only checks that it is installed, psycopg/libpq load in psycopg_fetchone.
+    import importlib.util
+
+    return importlib.util.find_spec("psycopg") is not None
+
+
+def _psycopg_params(conn: PsqlConnection) -> Dict[str, str]:
+    import psycopg.conninfo
+
+    # Same precedence as psql: -h/-p/-U/-d args, then DSN parameters, then PG* environment.
+    params: Dict[str, str] = {}
+    args = conn.args
+    for flag, value in zip(args[::2], args[1::2]):
+        key = _PSQL_ARG_TO_CONNINFO.get(flag)
+        if key == "dbname" and "://" in value:
+            params.update(psycopg.conninfo.conninfo_to_dict(value))
+        elif key:
+            params[key] = value
+    for var, key in _ENV_TO_CONNINFO.items():
+        if var not in conn.env:
+            continue
+        # A None delta unsets the variable for psql; libpq in this process still sees os.environ, so
+        # pass an explicit empty value instead (an empty password falls back to ~/.pgpass, as in psql).
+        params.setdefault(key, conn.env[var] or "")
+    return params
+
+
+def psycopg_fetchone(conn: PsqlConnection, sql: str) -> Optional[tuple]:
+    """Run one query in a read-only transaction over an in-process libpq connection (needs psycopg)."""
+    try:
+        import psycopg
+    except ImportError as exc:
+        raise PgSkillError("psycopg is not installed (pip install 'psycopg[binary]').") from exc
+    try:
+        with psycopg.connect(**_psycopg_params(conn)) as pg:
+            pg.read_only = True
+            return pg.execute(sql).fetchone()
+    except psycopg.Error as exc:
+        raise PgSkillError(f"Query failed: {redact_connection_hint(conn)}\n{exc}") from exc
+
+
+def psql_set_command(name: str, value: str) -> str:
+    # psql meta-command quoting: inside '...', '' is a literal quote and backslashes are escapes.
+    escaped = value.replace("\\", "\\\\").replace("'", "''")
+    return f"\\set {name} '{escaped}'\n"
+
+
+@functools.lru_cache(maxsize=1)
+def psql_major_version() -> Optional[int]:
+    try:
+        proc = subprocess.run(
+            [_psql_path() or "psql", "--version"], capture_output=True, text=True, timeout=10, check=False
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    match = re.search(r"PostgreSQL\)\s+(\d+)", proc.stdout)
+    return int(match.group(1)) if match else None
+
+
+class PsqlSession:
+    """
+    One long-lived psql process fed over stdin, so several queries share a single process spawn and
+    libpq connection. Each query is followed by `\echo`/`\warn` sentinels (psql 13+) that mark the
+    end of its stdout/stderr output; check PsqlSession.supported() before using it.
+    """
+
+    # Once the stdout sentinel is seen, the \warn one is next in psql's input; this only bounds the
+    # wait if psql never acknowledges it.
+    STDERR_SENTINEL_TIMEOUT_S = 30.0
+
+    @staticmethod
+    def supported() -> bool:
+        version = psql_major_version()
+        return version is not None and version >= 13
+
+    def __init__(self, conn: PsqlConnection, extra_args: Optional[List[str]] = None):
+        # ON_ERROR_STOP=0: a failed query must not end the session (errors are reported per query).
+        cmd = _psql_cmd(conn, ["-v", "ON_ERROR_STOP=0", *(extra_args or [])])
+        try:
+            self._proc = subprocess.Popen(
+                cmd,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+                env=_child_env(conn),
+            )
+        except OSError as exc:
+            raise PgSkillError(f"Failed to run psql: {exc}") from exc
+        import queue
+        import threading
+
+        self._stderr: "queue.Queue[Optional[str]]" = queue.Queue()
+        threading.Thread(target=self._drain_stderr, daemon=True).start()
+
+    def _drain_stderr(self) -> None:
+        assert self._proc.stderr is not None
+        for line in self._proc.stderr:
+            self._stderr.put(line)
+        self._stderr.put(None)
+
+    def _read_stderr_until(self, marker: str) -> str:
+        import queue
+
+        lines: List[str] = []
+        while True:
+            try:
+                line = self._stderr.get(timeout=self.STDERR_SENTINEL_TIMEOUT_S)
+            except queue.Empty:
+                self._proc.kill()
+                raise PgSkillError(
+                    "psql session did not answer its \\warn sentinel (psql 13+ required): " + "".join(lines)
+                ) from None
+            if line is None or line.rstrip("\n") == marker:
+                return "".join(lines)
+            lines.append(line)
+
+    def query(self, sql: str) -> str:
+        assert self._proc.stdin is not None and self._proc.stdout is not None
+        sql = sql.rstrip()
+        if not sql.endswith(";"):
+            sql += ";"
+        import uuid
+
+        marker = f"__pg_skill_end_{uuid.uuid4().hex}__"
+        try:
+            self._proc.stdin.write(f"{sql}\n\\echo {marker} :ERROR\n\\warn {marker}\n")
+            self._proc.stdin.flush()
+        except OSError as exc:
+            raise PgSkillError(f"psql session ended unexpectedly: {self._read_stderr_until(marker)}") from exc
+
+        out: List[str] = []
+        failed = True
+        for line in self._proc.stdout:
+            if line.startswith(marker):
+                failed = line.split()[-1] != "false"
+                break
+            out.append(line)
+        else:
+            raise PgSkillError(f"psql session ended unexpectedly: {self._read_stderr_until(marker)}")
+
+        err = self._read_stderr_until(marker)
+        if failed or "ERROR:" in err:
+            raise PgSkillError(err.rstrip() or "psql query failed")
+        return "".join(out)
+
+    def close(self) -> None:
+        if self._proc.poll() is None:
+            try:
+                assert self._proc.stdin is not None
+                self._proc.stdin.write("\\q\n")
+                self._proc.stdin.close()
+            except OSError:
+                pass
+            try:
+                self._proc.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self._proc.kill()
+                self._proc.wait()
+
+    def __enter__(self) -> "PsqlSession":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
 def add_common_args(parser: argparse.ArgumentParser) -> None:
     parser.add_argument("--config", help=f"Path to env.yaml (default resolution uses {CONFIG_ENV_VAR}/./env.yaml).")
     parser.add_argument("--profile", help="Datasource profile name (defaults to top-level 'default').")
 
 
-def load_connection_from_args(args: argparse.Namespace) -> Tuple[Path, str, PsqlConnection]:
+def load_connection_from_args(
+    args: argparse.Namespace, *, require_psql: bool = True
+) -> Tuple[Path, str, PsqlConnection]:
     config_path = resolve_config_path(args.config)
     config = load_config(config_path)
     profile_name, profile_cfg = pick_profile(config, args.profile)
@@ -265,7 +565,7 @@ def load_connection_from_args(args: argparse.Namespace) -> Tuple[Path, str, Psql
             "Warning: this profile uses a plaintext 'password' in env.yaml. "
             "Make sure the file is ignored by git and protected locally (permissions/secret handling).\n"
         )
-    conn = build_psql_connection(profile_cfg)
+    conn = build_psql_connection(profile_cfg, require_psql=require_psql)
     return config_path, profile_name, conn
 
 
@@ -303,14 +603,25 @@ def override_database(conn: PsqlConnection, database: str) -> PsqlConnection:
     return PsqlConnection(args=args, env=conn.env)
 
 
+# Unquoted SQL identifier; schema names are checked against it before being spliced into SQL text.
+IDENT_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+_WRITE_KEYWORDS = (
+    "insert", "update", "delete", "merge", "create", "alter", "drop",
+    "truncate", "grant", "revoke", "vacuum", "analyze", "copy",
+)
+# Matched against lowercased SQL; alternatives sharing a first letter are factored together.
 WRITE_SQL_RE = re.compile(
-    r"\b(insert|update|delete|merge|create|alter|drop|truncate|grant|revoke|vacuum|analyze|copy)\b",
-    re.IGNORECASE,
+    r"\b(insert|update|delete|merge|c(?:reate|opy)|a(?:lter|nalyze)|drop|truncate|grant|revoke|vacuum)\b"
 )
 
 
 def assert_read_only_sql(sql: str) -> None:
-    if WRITE_SQL_RE.search(sql):
+    low = sql.lower()
+    # Plain substring scan first: most read-only SQL never reaches the word-boundary regex.
+    if not any(kw in low for kw in _WRITE_KEYWORDS):
+        return
+    if WRITE_SQL_RE.search(low):
         raise PgSkillError(
             "Refusing to run potentially write/DDL SQL without --allow-write. "
             "If you're sure, re-run with --allow-write."
@@ -1,6 +1,9 @@
-import argparse
+from __future__ import annotations
+
 import sys
 from pathlib import Path
+from types import SimpleNamespace
+from typing import TYPE_CHECKING, List, Optional
 
 from pg_lib import (
     PgSkillError,
@@ -10,6 +13,12 @@ from pg_lib import (
     run_psql,
 )
 
+if TYPE_CHECKING:
+    import argparse
+
+_VALUE_FLAGS = ("--config", "--profile", "--sql", "--sql-file", "--format")
+_BOOL_FLAGS = ("--sql-stdin", "--allow-write")
+
 
 def _read_sql(args: argparse.Namespace) -> str:
     sources = [bool(args.sql), bool(args.sql_file), bool(args.sql_stdin)]
@@ -24,7 +33,9 @@ def _read_sql(args: argparse.Namespace) -> str:
     return sys.stdin.read()
 
 
-def main() -> int:
+def _build_parser() -> argparse.ArgumentParser:
+    import argparse
+
     parser = argparse.ArgumentParser(description="Run a PostgreSQL query via psql (read-only by default).")
     add_common_args(parser)
     parser.add_argument("--sql", help="SQL to run.")
@@ -32,7 +43,40 @@ def main() -> int:
     parser.add_argument("--sql-stdin", action="store_true", help="Read SQL from stdin.")
     parser.add_argument("--allow-write", action="store_true", help="Allow potentially write/DDL SQL.")
     parser.add_argument("--format", choices=["table", "tsv"], default="table")
-    args = parser.parse_args()
+    return parser
+
+
+def _fast_parse_args(argv: List[str]) -> Optional[SimpleNamespace]:
+    """
+    Parse the common, well-formed invocations without importing argparse (noticeable when pg_query
+    runs in a loop). Returns None for anything else (--help, abbreviations, errors) so argparse
+    handles it with its usual messages.
+    """
+    values = {"config": None, "profile": None, "sql": None, "sql_file": None, "format": "table"}
+    flags = {"sql_stdin": False, "allow_write": False}
+    i = 0
+    while i < len(argv):
+        arg = argv[i]
+        name, eq, value = arg.partition("=")
+        if name in _VALUE_FLAGS:
+            if not eq:
+                i += 1
+                if i >= len(argv) or argv[i].startswith("-"):
+                    return None
+                value = argv[i]
+            values[name[2:].replace("-", "_")] = value
+        elif arg in _BOOL_FLAGS:
+            flags[arg[2:].replace("-", "_")] = True
+        else:
+            return None
+        i += 1
+    if values["format"] not in ("table", "tsv"):
+        return None
+    return SimpleNamespace(**values, **flags)
+
+
+def main() -> int:
+    args = _fast_parse_args(sys.argv[1:]) or _build_parser().parse_args()
 
     try:
         _, _, conn = load_connection_from_args(args)
@@ -43,6 +87,9 @@ def main() -> int:
             assert_read_only_sql(sql)
 
         extra_args = ["-c", sql]
+        if not args.allow_write:
+            # The checked SQL runs as one transaction; --allow-write keeps psql's per-statement autocommit.
+            extra_args = ["--single-transaction", *extra_args]
         if args.format == "tsv":
             extra_args = ["-qAt", "-F", "\t", "-P", "footer=off", *extra_args]
 
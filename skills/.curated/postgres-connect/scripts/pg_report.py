@@ -1,122 +1,99 @@
 import argparse
-import json
 import sys
 
 from pg_lib import (
+    IDENT_RE,
     PgSkillError,
     add_common_args,
+    json_dumps_pretty,
     load_connection_from_args,
     override_database,
+    psycopg_available,
+    psycopg_fetchone,
     redact_connection_hint,
     run_psql,
 )
 
 
-REPORT_SQL_DB_ONLY = r"""
-select json_build_object(
-  'ok', true,
-  'now', now(),
-  'version', version(),
-  'server_version_num', current_setting('server_version_num')::int,
-  'database', current_database(),
-  'user', current_user,
-  'db_size_bytes', pg_database_size(current_database()),
-  'schemas', (
-    select coalesce(json_agg(n.nspname order by n.nspname), '[]'::json)
+# Catalog-only queries (no information_schema views), returned as a single psql -A row: fields are
+# separated by \x01 (psql -F) and list items by \x02. _parse_report_row turns it into the payload.
+FIELD_SEP = "\x01"
+LIST_SEP = "\x02"
+
+# Filled in with str.format: {schema} must already have passed IDENT_RE, {cluster_extra} is
+# empty or _CLUSTER_EXTRA. Literal braces are doubled.
+_REPORT_TEMPLATE = r"""
+select
+  to_json(now()) #>> '{{}}',
+  version(),
+  current_setting('server_version_num'),
+  current_database(),
+  current_user,
+  pg_database_size(current_database()),
+  (
+    select string_agg(n.nspname, E'\x02' order by n.nspname)
     from pg_namespace n
     where n.nspname <> 'information_schema' and n.nspname not like 'pg\_%' escape '\'
   ),
-  'schema_overview', json_build_object(
-    'schema', :'schema',
-    'tables', (
-      select count(*)
-      from information_schema.tables
-      where table_schema = :'schema' and table_type = 'BASE TABLE'
-    ),
-    'views', (
-      select count(*)
-      from information_schema.tables
-      where table_schema = :'schema' and table_type = 'VIEW'
-    ),
-    'matviews', (
-      select count(*) from pg_matviews where schemaname = :'schema'
-    ),
-    'functions', (
-      select count(*)
-      from pg_proc p
-      join pg_namespace n on n.oid = p.pronamespace
-      where n.nspname = :'schema'
-    ),
-    'triggers', (
-      select count(*)
-      from pg_trigger t
-      join pg_class c on c.oid = t.tgrelid
-      join pg_namespace n on n.oid = c.relnamespace
-      where n.nspname = :'schema' and not t.tgisinternal
-    )
+  '{schema}',
+  (select count(*) from pg_class c where c.relnamespace = s.oid and c.relkind in ('r', 'p')),
+  (select count(*) from pg_class c where c.relnamespace = s.oid and c.relkind = 'v'),
+  (select count(*) from pg_class c where c.relnamespace = s.oid and c.relkind = 'm'),
+  (select count(*) from pg_proc p where p.pronamespace = s.oid),
+  (
+    select count(*)
+    from pg_trigger t
+    join pg_class c on c.oid = t.tgrelid
+    where c.relnamespace = s.oid and not t.tgisinternal
   ),
-  'extensions', (
-    select coalesce(json_agg(e.extname order by e.extname), '[]'::json)
-    from pg_extension e
-  )
-)::text;
+  (select string_agg(e.extname, E'\x02' order by e.extname) from pg_extension e){cluster_extra}
+from (select 1) as one
+left join pg_namespace s on s.nspname = '{schema}';
 """
 
-REPORT_SQL_WITH_CLUSTER = r"""
-select json_build_object(
-  'ok', true,
-  'now', now(),
-  'version', version(),
-  'server_version_num', current_setting('server_version_num')::int,
-  'database', current_database(),
-  'user', current_user,
-  'db_size_bytes', pg_database_size(current_database()),
-  'schemas', (
-    select coalesce(json_agg(n.nspname order by n.nspname), '[]'::json)
-    from pg_namespace n
-    where n.nspname <> 'information_schema' and n.nspname not like 'pg\_%' escape '\'
-  ),
-  'schema_overview', json_build_object(
-    'schema', :'schema',
-    'tables', (
-      select count(*)
-      from information_schema.tables
-      where table_schema = :'schema' and table_type = 'BASE TABLE'
-    ),
-    'views', (
-      select count(*)
-      from information_schema.tables
-      where table_schema = :'schema' and table_type = 'VIEW'
-    ),
-    'matviews', (
-      select count(*) from pg_matviews where schemaname = :'schema'
-    ),
-    'functions', (
-      select count(*)
-      from pg_proc p
-      join pg_namespace n on n.oid = p.pronamespace
-      where n.nspname = :'schema'
-    ),
-    'triggers', (
-      select count(*)
-      from pg_trigger t
-      join pg_class c on c.oid = t.tgrelid
-      join pg_namespace n on n.oid = c.relnamespace
-      where n.nspname = :'schema' and not t.tgisinternal
-    )
-  ),
-  'extensions', (
-    select coalesce(json_agg(e.extname order by e.extname), '[]'::json)
-    from pg_extension e
-  ),
-  'databases', (
-    select coalesce(json_agg(d.datname order by d.datname), '[]'::json)
-    from pg_database d
-    where d.datistemplate = false
-  ),
-  'roles_count', (select count(*) from pg_roles)
-)::text;
-"""
+_CLUSTER_EXTRA = r""",
+  (select string_agg(d.datname, E'\x02' order by d.datname) from pg_database d where not d.datistemplate),
+  (select count(*) from pg_roles)"""
+
+
+def _split_list(field: str) -> list:
+    return field.split(LIST_SEP) if field else []
+
+
+def _parse_report_row(row: bytes) -> dict:
+    # Raw psql stdout: one decode of the row, no text-mode wrapper or newline translation.
+    return _payload_from_fields(row.rstrip(b"\n").decode("utf-8").split(FIELD_SEP))
+
+
+def _payload_from_fields(fields: list) -> dict:
+    if len(fields) not in (14, 16):
+        raise PgSkillError(f"Unexpected report output ({len(fields)} fields): {fields!r:.200}")
+    try:
+        payload = {
+            "ok": True,
+            "now": fields[0],
+            "version": fields[1],
+            "server_version_num": int(fields[2]),
+            "database": fields[3],
+            "user": fields[4],
+            "db_size_bytes": int(fields[5]),
+            "schemas": _split_list(fields[6]),
+            "schema_overview": {
+                "schema": fields[7],
+                "tables": int(fields[8]),
+                "views": int(fields[9]),
+                "matviews": int(fields[10]),
+                "functions": int(fields[11]),
+                "triggers": int(fields[12]),
+            },
+            "extensions": _split_list(fields[13]),
+        }
+        if len(fields) == 16:
+            payload["databases"] = _split_list(fields[14])
+            payload["roles_count"] = int(fields[15])
+    except ValueError as exc:
+        raise PgSkillError(f"Unexpected report output: {fields!r:.200}") from exc
+    return payload
 
 
 def _render_zh(payload: dict) -> str:
@@ -189,28 +166,45 @@ def main() -> int:
     )
     parser.add_argument("--format", choices=["text", "json"], default="text")
     parser.add_argument("--lang", choices=["zh", "en"], default="zh")
+    parser.add_argument(
+        "--backend",
+        choices=["auto", "psql", "psycopg"],
+        default="auto",
+        help="Query via psycopg in-process (no psql spawn) or psql; auto prefers psycopg when installed.",
+    )
     args = parser.parse_args()
 
     try:
-        _, _, conn = load_connection_from_args(args)
+        use_psycopg = args.backend == "psycopg" or (args.backend == "auto" and psycopg_available())
+        _, _, conn = load_connection_from_args(args, require_psql=not use_psycopg)
         if args.database:
             conn = override_database(conn, args.database)
 
-        sql = REPORT_SQL_WITH_CLUSTER if args.include_databases else REPORT_SQL_DB_ONLY
-        proc = run_psql(
-            conn,
-            ["-qAt", "-v", f"schema={args.schema}"],
-            input_text=sql,
-            capture_output=True,
+        # psql does not interpolate :'vars' in -c strings (and psycopg sends the statement as-is),
+        # so the validated schema name is inlined into the SQL.
+        if not IDENT_RE.fullmatch(args.schema):
+            raise PgSkillError("--schema must be a simple identifier (letters/numbers/_), e.g. public")
+        sql = _REPORT_TEMPLATE.format(
+            schema=args.schema,
+            cluster_extra=_CLUSTER_EXTRA if args.include_databases else "",
         )
-        if proc.returncode != 0:
-            sys.stderr.write(f"psql failed: {redact_connection_hint(conn)}\n")
-            sys.stderr.write(proc.stderr or "")
-            return proc.returncode
-
-        payload = json.loads((proc.stdout or "").strip() or "{}")
+        if use_psycopg:
+            row = psycopg_fetchone(conn, sql)
+            payload = _payload_from_fields(["" if v is None else str(v) for v in row or ()])
+        else:
+            proc = run_psql(
+                conn,
+                ["-qAt", "-F", FIELD_SEP, "--single-transaction", "-c", sql],
+                capture_output=True,
+                text=False,
+            )
+            if proc.returncode != 0:
+                sys.stderr.write(f"psql failed: {redact_connection_hint(conn)}\n")
+                sys.stderr.write((proc.stderr or b"").decode("utf-8", errors="replace"))
+                return proc.returncode
+            payload = _parse_report_row(proc.stdout or b"")
         if args.format == "json":
-            sys.stdout.write(json.dumps(payload, ensure_ascii=False, indent=2) + "\n")
+            sys.stdout.write(json_dumps_pretty(payload) + "\n")
         else:
             sys.stdout.write(_render_zh(payload) if args.lang == "zh" else _render_en(payload))
         return 0
@@ -1,46 +1,61 @@
-import argparse
 import re
 import sys
 from pathlib import Path
 
 
-PASSWORD_RE = re.compile(r"^(\s*password\s*:\s*)(.+?)\s*$")
-URL_RE = re.compile(r"^(\s*url\s*:\s*)(.+?)\s*$")
+# One MULTILINE pass over the whole file. [^\S\n] is "whitespace except newline", so a match never
+# spans lines: group 1 is a password line's prefix, group 2 the prefix of a url line holding a DSN.
+SECRET_RE = re.compile(
+    r"^([^\S\n]*password[^\S\n]*:[^\S\n]*).+?[^\S\n]*$"
+    r"|^([^\S\n]*url[^\S\n]*:[^\S\n]*)postgres(?:ql)?://.*?[^\S\n]*$",
+    re.MULTILINE,
+)
 
 
-def redact_line(line: str) -> str:
-    match = PASSWORD_RE.match(line)
-    if match:
-        return f'{match.group(1)}"<redacted>"\n'
+def _redact_match(match: "re.Match[str]") -> str:
+    if match.group(1) is not None:
+        return f'{match.group(1)}"<redacted>"'
+    # url values that are not DSNs (likely variable names) never match and are kept as-is.
+    return f'{match.group(2)}"<postgres-url-redacted>"'
 
-    match = URL_RE.match(line)
-    if match:
-        value = match.group(2).strip()
-        if value.startswith(("postgres://", "postgresql://")):
-            return f'{match.group(1)}"<postgres-url-redacted>"\n'
-        # If it's likely a variable name, keep it as-is (user can decide).
-        return line
 
-    return line
+def redact_text(text: str) -> str:
+    return SECRET_RE.sub(_redact_match, text)
 
 
-def main() -> int:
+def _parse_path_arg() -> str:
+    argv = sys.argv[1:]
+    # The only input is one optional positional path; argparse is loaded just for --help/odd input.
+    if not argv:
+        return "env.yaml"
+    if len(argv) == 1 and not argv[0].startswith("-"):
+        return argv[0]
+
+    import argparse
+
     parser = argparse.ArgumentParser(
         description="Redact secrets from env.yaml so it can be safely shared with an LLM (replaces password/url DSNs)."
     )
     parser.add_argument("path", nargs="?", default="env.yaml", help="Path to env.yaml (default: ./env.yaml).")
-    args = parser.parse_args()
+    return parser.parse_args(argv).path
 
-    path = Path(args.path).expanduser()
+
+def main() -> int:
+    path = Path(_parse_path_arg()).expanduser()
     if not path.exists():
         sys.stderr.write(f"File not found: {path}\n")
         return 2
 
-    text = path.read_text(encoding="utf-8")
-    redacted = "".join(redact_line(line) for line in text.splitlines(keepends=True))
-    sys.stdout.write(redacted)
-    if not redacted.endswith("\n"):
-        sys.stdout.write("\n")
+    data = path.read_bytes()
+    if b"password" not in data and b"url" not in data and b"\r" not in data:
+        # Nothing to redact (and no newlines to normalize): pass the bytes through undecoded.
+        sys.stdout.buffer.write(data if data.endswith(b"\n") else data + b"\n")
+        return 0
+
+    # Same newline handling as text-mode reads.
+    text = data.decode("utf-8").replace("\r\n", "\n").replace("\r", "\n")
+    redacted = redact_text(text)
+    sys.stdout.write(redacted if redacted.endswith("\n") else redacted + "\n")
     return 0
 
 
@@ -1,67 +1,237 @@
 #!/usr/bin/env python3
 import argparse
+import base64
+import hashlib
+import http.client
 import json
 import os
+import select
 import sys
-import urllib.error
+import tempfile
+import time
 import urllib.parse
 import urllib.request
-from typing import Any, Dict, List, Optional
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
 
+try:  # optional: faster JSON (de)serialization; the stdlib json module is the fallback
+    import orjson
+except ImportError:
+    orjson = None
 
-WECOM_API_BASE = "https://qyapi.weixin.qq.com/cgi-bin"
 
+# Request bodies: one compact encoder built at import instead of per json.dumps call.
+_encode_body = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
 
-def _http_get_json(url: str, timeout_s: float) -> dict:
-    req = urllib.request.Request(url, method="GET")
-    try:
-        with urllib.request.urlopen(req, timeout=timeout_s) as resp:
-            data = resp.read()
-    except urllib.error.HTTPError as e:
-        data = e.read()
-        raise RuntimeError(f"HTTP {e.code} GET failed: {data.decode('utf-8', errors='replace')}") from e
-    except urllib.error.URLError as e:
-        raise RuntimeError(f"GET failed: {e}") from e
-    try:
-        return json.loads(data.decode("utf-8"))
-    except Exception as e:  # noqa: BLE001
-        raise RuntimeError(f"Failed to parse JSON: {data[:200]!r}") from e
 
+def _json_body(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)  # already compact UTF-8 bytes
+    return _encode_body(obj).encode("utf-8")
 
-def _http_post_json(url: str, payload: Dict[str, Any], timeout_s: float) -> dict:
-    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
-    req = urllib.request.Request(
-        url,
-        data=body,
-        headers={"Content-Type": "application/json; charset=utf-8"},
-        method="POST",
-    )
+
+def _json_loads(data: bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)  # accepts UTF-8 bytes directly
+
+
+def _json_dumps(obj: Any, *, pretty: bool = False) -> str:
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if pretty else 0).decode("utf-8")
+    if pretty:
+        return json.dumps(obj, ensure_ascii=False, indent=2)
+    # Compact separators so the payload is byte-identical to orjson's.
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+
+WECOM_API_HOST = "qyapi.weixin.qq.com"
+WECOM_API_PATH = "/cgi-bin"
+TOKEN_CACHE_PATH = Path(os.environ.get("XDG_CACHE_HOME") or "~/.cache").expanduser() / "wecom" / "token.json"
+# message/send accepts at most this many user IDs in one touser list.
+MAX_TOUSER_PER_CALL = 1000
+# 40014: invalid access_token, 42001: access_token expired.
+_TOKEN_REJECTED_ERRCODES = {40014, 42001}
+
+
+class _ApiConnection:
+    """One keep-alive HTTPS connection shared by gettoken and message/send."""
+
+    def __init__(self, timeout_s: float, host: str = WECOM_API_HOST) -> None:
+        self.host = host
+        self.timeout_s = timeout_s
+        self._conn: Optional[http.client.HTTPSConnection] = None
+
+    def _connect(self) -> http.client.HTTPSConnection:
+        # http.client ignores *_proxy env vars, so tunnel through an HTTPS proxy ourselves.
+        proxy = urllib.request.getproxies().get("https")
+        if proxy and not urllib.request.proxy_bypass(self.host):
+            parts = urllib.parse.urlsplit(proxy if "://" in proxy else f"http://{proxy}")
+            port = parts.port or (443 if parts.scheme == "https" else 80)
+            headers = {}
+            if parts.username is not None:
+                # Same Basic credentials urllib sent on CONNECT for user:pass@ proxy URLs.
+                userpass = f"{urllib.parse.unquote(parts.username)}:{urllib.parse.unquote(parts.password or '')}"
+                headers["Proxy-Authorization"] = "Basic " + base64.b64encode(userpass.encode("utf-8")).decode("ascii")
+            conn = http.client.HTTPSConnection(parts.hostname, port, timeout=self.timeout_s)
+            conn.set_tunnel(self.host, 443, headers=headers)
+            return conn
+        return http.client.HTTPSConnection(self.host, timeout=self.timeout_s)
+
+    def request(self, method: str, path: str, body: Optional[bytes] = None) -> Tuple[int, bytes]:
+        headers = {"Connection": "keep-alive"}
+        if body is not None:
+            headers["Content-Type"] = "application/json; charset=utf-8"
+        for attempt in (0, 1):
+            if self._conn is not None and self._dropped():
+                self.close()
+            reused = self._conn is not None
+            if self._conn is None:
+                self._conn = self._connect()
+            sent = False
+            try:
+                self._conn.request(method, path, body=body, headers=headers)
+                sent = True
+                resp = self._conn.getresponse()
+                data = resp.read()
+            except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError):
+                self.close()
+                # The server may drop an idle keep-alive connection; retry once on a fresh one. Once
+                # the request is out, only GETs are replayed: a dropped message/send response may
+                # still mean the message was delivered.
+                if reused and attempt == 0 and (not sent or method == "GET"):
+                    continue
+                raise
+            except (OSError, http.client.HTTPException):
+                self.close()
+                raise
+            if resp.will_close:
+                self.close()
+            return resp.status, data
+        raise AssertionError("unreachable")
+
+    def _dropped(self) -> bool:
+        # An idle keep-alive socket that is readable has been closed (or reset) by the server.
+        sock = self._conn.sock if self._conn is not None else None
+        if sock is None:
+            return False
+        try:
+            return bool(select.select([sock], [], [], 0)[0])
+        except (OSError, ValueError):
+            return True
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+def _http_json(conn: _ApiConnection, method: str, path: str, body: Optional[bytes] = None) -> dict:
     try:
-        with urllib.request.urlopen(req, timeout=timeout_s) as resp:
-            data = resp.read()
-    except urllib.error.HTTPError as e:
-        data = e.read()
-        raise RuntimeError(f"HTTP {e.code} POST failed: {data.decode('utf-8', errors='replace')}") from e
-    except urllib.error.URLError as e:
-        raise RuntimeError(f"POST failed: {e}") from e
+        status, data = conn.request(method, path, body)
+    except (OSError, http.client.HTTPException) as e:
+        raise RuntimeError(f"{method} failed: {e}") from e
+    if status >= 400:
+        raise RuntimeError(f"HTTP {status} {method} failed: {data.decode('utf-8', errors='replace')}")
     try:
-        return json.loads(data.decode("utf-8"))
+        return _json_loads(data)
     except Exception as e:  # noqa: BLE001
         raise RuntimeError(f"Failed to parse JSON: {data[:200]!r}") from e
 
 
-def get_access_token(*, corp_id: str, corp_secret: str, timeout_s: float) -> str:
+def _http_get_json(conn: _ApiConnection, path: str) -> dict:
+    return _http_json(conn, "GET", path)
+
+
+def _http_post_json(conn: _ApiConnection, path: str, payload: Dict[str, Any]) -> dict:
+    return _http_json(conn, "POST", path, _json_body(payload))
+
+
+def _fetch_access_token(
+    *, corp_id: str, corp_secret: str, timeout_s: float, conn: Optional[_ApiConnection] = None
+) -> Tuple[str, int]:
     qs = urllib.parse.urlencode({"corpid": corp_id, "corpsecret": corp_secret})
-    url = f"{WECOM_API_BASE}/gettoken?{qs}"
-    resp = _http_get_json(url, timeout_s)
+    path = f"{WECOM_API_PATH}/gettoken?{qs}"
+    api = conn or _ApiConnection(timeout_s)
+    try:
+        resp = _http_get_json(api, path)
+    finally:
+        if conn is None:
+            api.close()
     if resp.get("errcode") != 0:
         raise RuntimeError(f"gettoken failed: {json.dumps(resp, ensure_ascii=False)}")
     token = resp.get("access_token")
     if not token:
         raise RuntimeError(f"gettoken missing access_token: {json.dumps(resp, ensure_ascii=False)}")
+    expires_in = resp.get("expires_in")
+    return token, expires_in if isinstance(expires_in, int) else 7200
+
+
+def get_access_token(
+    *, corp_id: str, corp_secret: str, timeout_s: float, conn: Optional[_ApiConnection] = None
+) -> str:
+    token, _ = _fetch_access_token(corp_id=corp_id, corp_secret=corp_secret, timeout_s=timeout_s, conn=conn)
     return token
 
 
+def _token_cache_key(corp_id: str, corp_secret: str) -> str:
+    # Tokens belong to a corp_id + app secret; only a digest of the secret is stored.
+    return f"{corp_id}:{hashlib.sha256(corp_secret.encode('utf-8')).hexdigest()[:16]}"
+
+
+def _read_token_cache() -> Dict[str, Any]:
+    try:
+        data = _json_loads(TOKEN_CACHE_PATH.read_bytes())
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def _load_cached_token(key: str) -> Optional[str]:
+    entry = _read_token_cache().get(key)
+    if not isinstance(entry, dict):
+        return None
+    token, expires_at = entry.get("token"), entry.get("expires_at")
+    if isinstance(token, str) and token and isinstance(expires_at, (int, float)) and time.time() < expires_at - 60:
+        return token
+    return None
+
+
+def _store_cached_token(key: str, token: str, expires_in: int) -> None:
+    # Best effort, written 0600 (mkstemp) and swapped in atomically.
+    cache = _read_token_cache()
+    cache[key] = {"token": token, "expires_at": time.time() + expires_in}
+    try:
+        TOKEN_CACHE_PATH.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(prefix="token.", dir=str(TOKEN_CACHE_PATH.parent))
+    except OSError:
+        return
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(_json_dumps(cache))
+        os.replace(tmp, TOKEN_CACHE_PATH)
+    except OSError:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+
+
+def _access_token(args: argparse.Namespace, conn: _ApiConnection, *, refresh: bool = False) -> Tuple[str, bool]:
+    """Returns (token, from_cache)."""
+    key = _token_cache_key(args.corp_id, args.corp_secret)
+    if not args.no_token_cache and not refresh:
+        cached = _load_cached_token(key)
+        if cached:
+            return cached, True
+    token, expires_in = _fetch_access_token(
+        corp_id=args.corp_id, corp_secret=args.corp_secret, timeout_s=args.timeout, conn=conn
+    )
+    if not args.no_token_cache:
+        _store_cached_token(key, token, expires_in)
+    return token, False
+
+
 def send_app_message(
     *,
     access_token: str,
@@ -76,8 +246,9 @@ def send_app_message(
     enable_duplicate_check: Optional[int],
     duplicate_check_interval: Optional[int],
     timeout_s: float,
+    conn: Optional[_ApiConnection] = None,
 ) -> dict:
-    url = f"{WECOM_API_BASE}/message/send?access_token={urllib.parse.quote(access_token)}"
+    path = f"{WECOM_API_PATH}/message/send?access_token={urllib.parse.quote(access_token)}"
 
     payload: Dict[str, Any] = {
         "agentid": agent_id,
@@ -105,8 +276,28 @@ def send_app_message(
     if duplicate_check_interval is not None:
         payload["duplicate_check_interval"] = duplicate_check_interval
 
-    resp = _http_post_json(url, payload, timeout_s)
-    return resp
+    api = conn or _ApiConnection(timeout_s)
+    try:
+        return _http_post_json(api, path, payload)
+    finally:
+        if conn is None:
+            api.close()
+
+
+def _read_user_ids(path: str) -> List[str]:
+    # One ID per line ("a|b" lines are split too); blanks and duplicates are dropped, order kept.
+    text = Path(path).expanduser().read_text(encoding="utf-8")
+    ids = (uid.strip() for line in text.splitlines() for uid in line.split("|"))
+    return list(dict.fromkeys(uid for uid in ids if uid))
+
+
+def _touser_batches(touser: Optional[str]) -> List[Optional[str]]:
+    if not touser or touser == "@all" or not touser.startswith("@"):
+        return [touser]
+    ids = _read_user_ids(touser[1:])
+    if not ids:
+        return [None]
+    return ["|".join(ids[i : i + MAX_TOUSER_PER_CALL]) for i in range(0, len(ids), MAX_TOUSER_PER_CALL)]
 
 
 def _env(name: str) -> Optional[str]:
@@ -123,7 +314,13 @@ def main(argv: List[str]) -> int:
         "--corp-secret", default=_env("WECOM_CORP_SECRET"), help="WeCom corp_secret (or env WECOM_CORP_SECRET)"
     )
     parser.add_argument("--agent-id", default=_env("WECOM_AGENT_ID"), help="WeCom agent_id (or env WECOM_AGENT_ID)")
-    parser.add_argument("--touser", help='Recipients by user IDs, e.g. "zhangsan|lisi" or "@all"')
+    parser.add_argument(
+        "--touser",
+        help=(
+            'Recipients by user IDs, e.g. "zhangsan|lisi" or "@all"; "@path" reads IDs from a file '
+            f"(one per line, sent in batches of {MAX_TOUSER_PER_CALL})"
+        ),
+    )
     parser.add_argument("--toparty", help='Recipients by party IDs, e.g. "1|2"')
     parser.add_argument("--totag", help='Recipients by tag IDs, e.g. "1|2"')
     msg_group = parser.add_mutually_exclusive_group(required=True)
@@ -135,6 +332,11 @@ def main(argv: List[str]) -> int:
     parser.add_argument("--duplicate-check-interval", type=int, default=None)
     parser.add_argument("--timeout", type=float, default=20.0, help="HTTP timeout seconds (default: 20)")
     parser.add_argument("--pretty", action="store_true", help="Pretty-print JSON output")
+    parser.add_argument(
+        "--no-token-cache",
+        action="store_true",
+        help=f"Always call gettoken instead of reusing the access_token cached in {TOKEN_CACHE_PATH}",
+    )
 
     args = parser.parse_args(argv)
 
@@ -153,17 +355,19 @@ def main(argv: List[str]) -> int:
     if not (args.touser or args.toparty or args.totag):
         parser.error("At least one of --touser/--toparty/--totag is required")
 
+    try:
+        touser_batches = _touser_batches(args.touser)
+    except OSError as e:
+        parser.error(f"Failed to read --touser file: {e}")
+    if touser_batches == [None] and not (args.toparty or args.totag):
+        parser.error("--touser file contains no user IDs")
+
     msgtype = "text" if args.text is not None else "markdown"
     content = args.text if args.text is not None else args.markdown
     assert content is not None
 
-    token = get_access_token(corp_id=args.corp_id, corp_secret=args.corp_secret, timeout_s=args.timeout)
-    resp = send_app_message(
-        access_token=token,
+    send_kwargs: Dict[str, Any] = dict(
         agent_id=agent_id_int,
-        touser=args.touser,
-        toparty=args.toparty,
-        totag=args.totag,
         msgtype=msgtype,
         content=content,
         safe=args.safe,
@@ -172,12 +376,30 @@ def main(argv: List[str]) -> int:
         duplicate_check_interval=args.duplicate_check_interval,
         timeout_s=args.timeout,
     )
+    conn = _ApiConnection(args.timeout)
+    try:
+        token, from_cache = _access_token(args, conn)
+        responses = []
+        for idx, touser in enumerate(touser_batches):
+            # Parties/tags ride along with the first batch only, so nobody gets the message twice.
+            recipients = dict(
+                touser=touser,
+                toparty=args.toparty if idx == 0 else None,
+                totag=args.totag if idx == 0 else None,
+            )
+            resp = send_app_message(access_token=token, conn=conn, **recipients, **send_kwargs)
+            if from_cache and resp.get("errcode") in _TOKEN_REJECTED_ERRCODES:
+                # Cached token was revoked/expired early: refresh it and retry once.
+                token, from_cache = _access_token(args, conn, refresh=True)
+                resp = send_app_message(access_token=token, conn=conn, **recipients, **send_kwargs)
+            responses.append(resp)
+    finally:
+        conn.close()
 
-    out = json.dumps(resp, ensure_ascii=False, indent=2 if args.pretty else None, sort_keys=False)
-    sys.stdout.write(out + "\n")
+    out = responses[0] if len(responses) == 1 else responses
+    sys.stdout.write(_json_dumps(out, pretty=args.pretty) + "\n")
 
-    errcode = resp.get("errcode")
-    return 0 if errcode == 0 else 2
+    return 0 if all(resp.get("errcode") == 0 for resp in responses) else 2
 
 
 if __name__ == "__main__":